@@ -0,0 +1,39 @@
+import sys
+from io import StringIO
+from timeit import timeit
+
+from htmlnode import *
+from textnode import TextNode, TextType, text_to_html, code_to_html
+
+ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+def nested_code_to_html(block):
+    child = text_to_html(TextNode(escape_html(block[3:-3]), TextType.NORMAL))
+    return ParentNode("pre", [ParentNode("code", [child])])
+
+def translate_escape(text):
+    return text.translate(ESCAPE_TABLE)
+
+def code_block(size):
+    line = "    if (node->next != NULL && count < limit) { total += node->value; }\n"
+    return f"```\n{line * (size // len(line) + 1)}```"
+
+def write_html(node):
+    fp = StringIO()
+    node.write_html(fp)
+    return fp
+
+if __name__ == "__main__":
+    sizes = [float(arg) for arg in sys.argv[1:]] or [0.001, 1, 4, 16]
+    print(f"{'MB':>6} {'nested (ms)':>12} {'verbatim (ms)':>14} {'write (ms)':>11} {'translate (ms)':>15} {'replace (ms)':>13}")
+    for size in sizes:
+        block = code_block(int(size * 1024 * 1024))
+        if translate_escape(block) != escape_html(block) or nested_code_to_html(block).to_html() != code_to_html(block).to_html():
+            raise Exception("escaping strategies disagree")
+        runs = max(1, int(16 / size))
+        nested = timeit(lambda: nested_code_to_html(block).to_html(), number=runs) / runs * 1000
+        verbatim = timeit(lambda: code_to_html(block).to_html(), number=runs) / runs * 1000
+        written = timeit(lambda: write_html(code_to_html(block)), number=runs) / runs * 1000
+        translate = timeit(lambda: translate_escape(block), number=runs) / runs * 1000
+        replace = timeit(lambda: escape_html(block), number=runs) / runs * 1000
+        print(f"{size:>6g} {nested:>12.2f} {verbatim:>14.2f} {written:>11.2f} {translate:>15.2f} {replace:>13.2f}")
@@ -0,0 +1,45 @@
+import random
+import sys
+from timeit import timeit
+
+from textnode import *
+
+def chained_text_to_textnodes(text):
+    return split_nodes_link(
+        split_nodes_image(
+            split_nodes_delimiter(
+                split_nodes_delimiter(
+                    split_nodes_delimiter(
+                        [TextNode(text, TextType.NORMAL)], '**', TextType.BOLD)
+                , '_', TextType.ITALIC)
+            , '`', TextType.CODE)
+        )
+    )
+
+def link_heavy_paragraph(links, seed=0):
+    rng = random.Random(seed)
+    words = ["tolkien", "hobbit", "ring", "elves", "shire", "wizard", "mountain"]
+    parts = []
+    for i in range(links):
+        parts.append(" ".join(rng.choice(words) for _ in range(rng.randint(2, 6))))
+        parts.append(rng.choice([
+            f" [{rng.choice(words)} {i}](/blog/{i}) ",
+            f" ![{rng.choice(words)} {i}](/images/{i}.png) ",
+            f" **{rng.choice(words)}** ",
+            f" _{rng.choice(words)}_ ",
+            f" `{rng.choice(words)}` ",
+        ]))
+    parts.append("the end")
+    return "".join(parts)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000]
+    print(f"{'spans':>8} {'chained (ms)':>14} {'single pass (ms)':>18} {'speedup':>9}")
+    for size in sizes:
+        text = link_heavy_paragraph(size)
+        if chained_text_to_textnodes(text) != text_to_textnodes(text):
+            raise Exception(f"tokenizers disagree on the {size} span paragraph")
+        runs = max(1, 2000 // size)
+        chained = timeit(lambda: chained_text_to_textnodes(text), number=runs) / runs * 1000
+        single = timeit(lambda: text_to_textnodes(text), number=runs) / runs * 1000
+        print(f"{size:>8} {chained:>14.3f} {single:>18.3f} {chained / single:>8.1f}x")
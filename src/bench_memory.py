@@ -0,0 +1,22 @@
+import resource
+import sys
+import time
+
+from textnode import markdown_to_html_node
+from corpus import synthetic_markdown
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children or [])
+
+if __name__ == "__main__":
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    markdown = synthetic_markdown(int(size_mb * 1024 * 1024))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    html_node = markdown_to_html_node(markdown)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"markdown size:   {len(markdown) / 1024 / 1024:.1f} MB")
+    print(f"html nodes:      {count_nodes(html_node)}")
+    print(f"build time:      {elapsed:.2f} s")
+    print(f"peak RSS:        {peak / 1024:.1f} MB ({(peak - baseline) / 1024:.1f} MB above the loaded markdown)")
@@ -0,0 +1,119 @@
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+from time import perf_counter
+
+from corpus import synthetic_markdown, write_corpus
+from textnode import markdown_to_blocks, block_to_block_type, text_to_textnodes, markdown_to_html_node
+from generate_site import generate_page_recursive
+from console import set_verbosity, QUIET
+
+SIZES = {"1k": 1024, "10k": 10 * 1024, "100k": 100 * 1024, "1m": 1024 * 1024, "10m": 10 * 1024 * 1024}
+PRESETS = {
+    "quick": {"page_sizes": ["1k", "100k"], "page_counts": [10, 100]},
+    "default": {"page_sizes": ["1k", "10k", "100k", "1m"], "page_counts": [10, 100, 1000]},
+    "full": {"page_sizes": ["1k", "10k", "100k", "1m", "10m"], "page_counts": [10, 100, 1000, 10000, 100000]},
+}
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        func(*args)
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def inline_texts(markdown):
+    return [block for block in markdown_to_blocks(markdown) if not block.startswith("```")]
+
+def bench_page_stages(page_size, density, repeat):
+    markdown = synthetic_markdown(SIZES[page_size], link_density=density, emphasis_density=density)
+    blocks = markdown_to_blocks(markdown)
+    texts = inline_texts(markdown)
+    stages = {
+        "markdown_to_blocks": lambda: markdown_to_blocks(markdown),
+        "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in texts],
+        "markdown_to_html_node+to_html": lambda: markdown_to_html_node(markdown).to_html(),
+    }
+    results = []
+    for stage, func in stages.items():
+        seconds = best_of(repeat, func)
+        results.append({
+            "benchmark": stage,
+            "page_size": page_size,
+            "density": density,
+            "seconds": seconds,
+            "mb_per_s": len(markdown) / 1024 / 1024 / seconds if seconds else None,
+        })
+    return results
+
+def bench_build(page_count, page_size, repeat):
+    with tempfile.TemporaryDirectory() as root:
+        write_corpus(f"{root}/content/", page_count, SIZES[page_size])
+        with open(f"{root}/template.html", "w") as f:
+            f.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+
+        def build():
+            generate_page_recursive(f"{root}/content/", f"{root}/template.html", f"{root}/docs/", "/")
+
+        seconds = best_of(repeat, build)
+    return {
+        "benchmark": "generate_page_recursive",
+        "pages": page_count,
+        "page_size": page_size,
+        "seconds": seconds,
+        "pages_per_s": page_count / seconds,
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def result_key(result):
+    return (result["benchmark"], result.get("pages"), result["page_size"], result.get("density"))
+
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = {result_key(result): result["seconds"] for result in json.load(f)["results"]}
+    for result in results:
+        before = previous.get(result_key(result))
+        if before:
+            change = (result["seconds"] - before) / before * 100
+            print(f"  {result_key(result)}: {before * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms ({change:+.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline on synthetic corpora")
+    parser.add_argument("--preset", choices=PRESETS, default="default")
+    parser.add_argument("--page-sizes", nargs="+", choices=SIZES, help="override the preset page sizes")
+    parser.add_argument("--page-counts", nargs="+", type=int, help="override the preset page counts")
+    parser.add_argument("--densities", nargs="+", type=float, default=[0.05, 0.3], help="link/emphasis density per word")
+    parser.add_argument("--build-page-size", choices=SIZES, default="10k", help="page size used by the full build benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="PATH", help="print the change against an earlier results file")
+    args = parser.parse_args()
+    set_verbosity(QUIET)
+
+    preset = PRESETS[args.preset]
+    results = []
+    for page_size in args.page_sizes or preset["page_sizes"]:
+        for density in args.densities:
+            for result in bench_page_stages(page_size, density, args.repeat):
+                print(f"{result['benchmark']:<32} {page_size:>5} density {density:<5} {result['seconds'] * 1000:>10.2f} ms {result['mb_per_s']:>8.2f} MB/s")
+                results.append(result)
+    for page_count in args.page_counts or preset["page_counts"]:
+        result = bench_build(page_count, args.build_page_size, args.repeat)
+        print(f"{result['benchmark']:<32} {page_count:>7} x {args.build_page_size:<5} {result['seconds']:>10.2f} s {result['pages_per_s']:>8.1f} pages/s")
+        results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump({"revision": git_revision(), "python": platform.python_version(), "results": results}, f, indent=1)
+    print(f"Wrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
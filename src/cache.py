@@ -0,0 +1,109 @@
+import marshal
+from collections import OrderedDict
+from hashlib import sha256
+from os import path, makedirs, replace, getpid
+from htmlnode import LeafNode, node_from_tuple
+from textnode import block_to_html
+
+CACHE_VERSION = 3
+
+def entry_bytes(key, html, urls):
+    return len(key[0]) + len(key[1]) + len(html) + sum(len(url) for url in urls)
+
+class BlockCache:
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, html, urls=()):
+        entry_size = entry_bytes(key, html, urls)
+        if entry_size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.size -= entry_bytes(key, *self.entries.pop(key))
+        self.entries[key] = (html, urls)
+        self.size += entry_size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.size -= entry_bytes(evicted_key, *evicted)
+
+    def render(self, block, namespace, rewrite_url=None, block_type=None):
+        key = (namespace, block)
+        entry = self.get(key)
+        # urls seen while rendering are replayed on hits so collectors see every link
+        recorded = getattr(rewrite_url, "urls", None)
+        if entry is None:
+            if recorded is not None:
+                rewrite_url.block_urls = set()
+            html = block_to_html(block, rewrite_url, block_type).to_html()
+            urls = ()
+            if recorded is not None:
+                urls = tuple(sorted(rewrite_url.block_urls))
+                rewrite_url.block_urls = None
+            self.put(key, html, urls)
+        else:
+            html, urls = entry
+            if recorded is not None:
+                recorded.update(urls)
+        return LeafNode(None, html)
+
+    def load(self, cache_path):
+        if not path.exists(cache_path):
+            return
+        with open(cache_path, "rb") as f:
+            data = marshal.load(f)
+        if data.get("version") != CACHE_VERSION:
+            return
+        for namespace, block, html, urls in data["entries"]:
+            self.put((namespace, block), html, urls)
+
+    def save(self, cache_path):
+        makedirs(path.dirname(cache_path), exist_ok=True)
+        entries = [(namespace, block, html, urls) for (namespace, block), (html, urls) in self.entries.items()]
+        with open(f"{cache_path}.tmp", "wb") as f:
+            marshal.dump({"version": CACHE_VERSION, "entries": entries}, f)
+        replace(f"{cache_path}.tmp", cache_path)
+
+class AstCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source, namespace):
+        digest = sha256(f"{CACHE_VERSION}\0{namespace}\0".encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return f"{self.cache_dir}{key[:2]}/{key}.marshal"
+
+    def get(self, key):
+        entry_path = self.entry_path(key)
+        if not path.exists(entry_path):
+            self.misses += 1
+            return None
+        with open(entry_path, "rb") as f:
+            values, tree, urls = marshal.load(f)
+        self.hits += 1
+        return values, node_from_tuple(tree), urls
+
+    def put(self, key, values, html_node, urls=()):
+        entry_path = self.entry_path(key)
+        makedirs(path.dirname(entry_path), exist_ok=True)
+        with open(f"{entry_path}.{getpid()}.tmp", "wb") as f:
+            marshal.dump((values, html_node.to_tuple(), tuple(sorted(urls))), f)
+        replace(f"{entry_path}.{getpid()}.tmp", entry_path)
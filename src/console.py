@@ -0,0 +1,13 @@
+QUIET = 0
+NORMAL = 1
+VERBOSE = 2
+
+verbosity = NORMAL
+
+def set_verbosity(level):
+    global verbosity
+    verbosity = level
+
+def log(message, level=NORMAL):
+    if level <= verbosity:
+        print(message)
@@ -0,0 +1,55 @@
+import random
+from os import makedirs
+
+WORDS = ["tolkien", "hobbit", "ring", "elves", "shire", "wizard", "mountain", "river", "dwarf", "middle", "earth", "valar"]
+
+def synthetic_markdown(size_bytes, seed=0, link_density=0.1, emphasis_density=0.1):
+    rng = random.Random(seed)
+    blocks = [f"# Page {seed}"]
+    written = len(blocks[0])
+    i = 0
+
+    def inline_text(count):
+        parts = []
+        for _ in range(count):
+            roll = rng.random()
+            word = rng.choice(WORDS)
+            if roll < link_density / 2:
+                parts.append(f"[{word}](/blog/{rng.randrange(1000)})")
+            elif roll < link_density:
+                parts.append(f"![{word}](/images/{rng.randrange(100)}.png)")
+            elif roll < link_density + emphasis_density / 3:
+                parts.append(f"**{word}**")
+            elif roll < link_density + emphasis_density * 2 / 3:
+                parts.append(f"_{word}_")
+            elif roll < link_density + emphasis_density:
+                parts.append(f"`{word}`")
+            else:
+                parts.append(word)
+        return " ".join(parts)
+
+    while written < size_bytes:
+        i += 1
+        kind = rng.randrange(6)
+        if kind == 0:
+            block = f"## {rng.choice(WORDS).title()} {i}"
+        elif kind == 1:
+            block = "\n".join(f"- {inline_text(rng.randint(3, 10))}" for _ in range(rng.randint(2, 8)))
+        elif kind == 2:
+            block = "\n".join(f"{j}. {inline_text(rng.randint(3, 10))}" for j in range(1, rng.randint(2, 9)))
+        elif kind == 3:
+            block = "```\n" + "\n".join(" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(rng.randint(2, 10))) + "\n```"
+        elif kind == 4:
+            block = "\n".join(f"> {inline_text(rng.randint(3, 10))}" for _ in range(rng.randint(1, 4)))
+        else:
+            block = "\n".join(inline_text(rng.randint(5, 15)) for _ in range(rng.randint(1, 5)))
+        blocks.append(block)
+        written += len(block) + 2
+    return "\n\n".join(blocks)
+
+def write_corpus(dir_path_content, pages, page_size, seed=0, link_density=0.1, emphasis_density=0.1, pages_per_dir=1000):
+    for page in range(pages):
+        page_dir = f"{dir_path_content}section{page // pages_per_dir}/page{page}/"
+        makedirs(page_dir, exist_ok=True)
+        with open(f"{page_dir}index.md", "w") as f:
+            f.write(synthetic_markdown(page_size, seed + page, link_density, emphasis_density))
@@ -0,0 +1,84 @@
+import json
+from os import path, makedirs
+from directives import digest
+from console import log, QUIET
+
+def load_graph(graph_path):
+    if not path.exists(graph_path):
+        return {}
+    with open(graph_path) as f:
+        return json.load(f)
+
+def save_graph(graph_path, graph):
+    makedirs(path.dirname(graph_path), exist_ok=True)
+    with open(graph_path, "w") as f:
+        json.dump(graph, f, indent=1, sort_keys=True)
+
+def resolve_url(url, url_sources, static_files):
+    if not url.startswith("/") or url.startswith("//"):
+        return None
+    url_path = url.split("#", 1)[0].split("?", 1)[0]
+    for candidate in (url_path, f"{url_path}/", f"{url_path}.html", url_path.removesuffix("index.html")):
+        if candidate in url_sources:
+            return "links", url_sources[candidate]
+    if url_path[1:] in static_files:
+        return "assets", url_path[1:]
+    return None
+
+def page_edges(page, url_sources, static_files):
+    targets = {"links": set(), "assets": set(), "broken": set()}
+    for url in page.get("urls", ()):
+        target = resolve_url(url, url_sources, static_files)
+        if target is not None:
+            targets[target[0]].add(target[1])
+        elif url.startswith("/") and not url.startswith("//"):
+            targets["broken"].add(url)
+    edges = {"partials": page.get("partials", {}), "lists": page.get("lists", {})}
+    for kind, found in targets.items():
+        edges[kind] = sorted(found)
+    return edges
+
+def broken_links(graph, url_sources, static_files):
+    sources = set(url_sources.values())
+    broken = {}
+    for from_path, edges in graph.items():
+        targets = [url for url in edges.get("broken", ()) if resolve_url(url, url_sources, static_files) is None]
+        targets.extend(f"removed page {target}" for target in edges.get("links", ()) if target not in sources)
+        targets.extend(f"removed file /{target}" for target in edges.get("assets", ()) if target not in static_files)
+        if targets:
+            broken[from_path] = targets
+    return broken
+
+def report_broken_links(broken):
+    for from_path in sorted(broken):
+        for target in broken[from_path]:
+            log(f"{from_path}: broken link to {target}", QUIET)
+    if broken:
+        log(f"Found {sum(len(targets) for targets in broken.values())} broken links in {len(broken)} pages", QUIET)
+
+def dependents(graph, kind, targets):
+    return {from_path for from_path, edges in graph.items() if any(target in targets for target in edges.get(kind, ()))}
+
+class PartialHashes:
+    def __init__(self):
+        self.hashes = {}
+
+    def get(self, partial_path):
+        if partial_path not in self.hashes:
+            if path.exists(partial_path):
+                with open(partial_path) as f:
+                    self.hashes[partial_path] = digest(f.read())
+            else:
+                self.hashes[partial_path] = None
+        return self.hashes[partial_path]
+
+def outdated(edges, partial_hashes, directives=None):
+    for partial_path, partial_digest in edges.get("partials", {}).items():
+        if partial_hashes.get(partial_path) != partial_digest:
+            return True
+    if directives is None:
+        return False
+    for section, listing_digest in edges.get("lists", {}).items():
+        if digest(directives.section_listing(section)) != listing_digest:
+            return True
+    return False
@@ -0,0 +1,66 @@
+import re
+from hashlib import sha256
+from textnode import markdown_to_blocks, is_code
+
+DIRECTIVE_PATTERN = re.compile(r"^\{\{ *(include|pages) +(\S+?) *\}\}$", re.MULTILINE)
+MAX_INCLUDE_DEPTH = 8
+# titles go into link text, so characters the inline parser acts on become entities
+TITLE_ESCAPES = str.maketrans({"[": "&#91;", "]": "&#93;", "`": "&#96;", "_": "&#95;", "*": "&#42;"})
+
+def digest(text):
+    return sha256(text.encode()).hexdigest()
+
+class Directives:
+    def __init__(self, content_path="", partials_path=None, pages=None):
+        self.content_path = content_path
+        self.partials_path = partials_path
+        self.pages = pages or {}
+
+    def expand(self, markdown, deps, depth=0):
+        if "{{" not in markdown:
+            return markdown
+        return "\n\n".join(self.expand_block(block, deps, depth) for block in markdown.split("\n\n"))
+
+    def expand_blocks(self, blocks, deps):
+        for block in blocks:
+            if "{{" in block and not is_code(block):
+                yield from markdown_to_blocks(self.expand_block(block, deps))
+            else:
+                yield block
+
+    def expand_block(self, block, deps, depth=0):
+        # directives inside fenced code are shown as written
+        if "{{" not in block or is_code(block.strip()):
+            return block
+        return DIRECTIVE_PATTERN.sub(lambda match: self.directive(match.group(1), match.group(2), deps, depth), block)
+
+    def directive(self, name, argument, deps, depth):
+        if name == "include":
+            return self.include(argument, deps, depth)
+        return self.listing(argument, deps)
+
+    def include(self, name, deps, depth):
+        if self.partials_path is None:
+            raise Exception(f"Cannot include {name}: no partials directory")
+        if depth >= MAX_INCLUDE_DEPTH:
+            raise Exception(f"Partials nested deeper than {MAX_INCLUDE_DEPTH} levels at {name}")
+        partial_path = f"{self.partials_path}{name}"
+        with open(partial_path) as f:
+            markdown = f.read()
+        deps.setdefault("partials", {})[partial_path] = digest(markdown)
+        return self.expand(markdown.strip(), deps, depth + 1)
+
+    def listing(self, section, deps):
+        markdown = self.section_listing(section)
+        deps.setdefault("lists", {})[section] = digest(markdown)
+        return markdown
+
+    def section_listing(self, section):
+        section = section.strip("/")
+        prefix = f"{self.content_path}{section}/" if section else self.content_path
+        entries = sorted(
+            (page["url"], page["title"])
+            for from_path, page in self.pages.items()
+            if from_path.startswith(prefix) and from_path != f"{prefix}index.md" and page["title"] is not None
+        )
+        return "\n".join(f"- [{title.translate(TITLE_ESCAPES)}]({url})" for url, title in entries)
@@ -0,0 +1,34 @@
+import json
+from hashlib import sha256
+from os import path
+
+HASH_LENGTH = 8
+
+def hashed_name(inner_path, digest):
+    root, ext = path.splitext(inner_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+def url_path_end(url):
+    ends = [i for i in (url.find("?"), url.find("#")) if i != -1]
+    return min(ends) if ends else len(url)
+
+class AssetManifest:
+    def __init__(self, names):
+        self.names = names
+        self.digest = sha256(json.dumps(names, sort_keys=True).encode()).hexdigest()
+
+    def asset_path(self, url):
+        if not url.startswith("/") or url.startswith("//"):
+            return None
+        inner_path = url[1:url_path_end(url)]
+        return inner_path if inner_path in self.names else None
+
+    def url(self, url):
+        inner_path = self.asset_path(url)
+        if inner_path is None:
+            return url
+        return f"/{self.names[inner_path]}{url[url_path_end(url):]}"
+
+    def save(self, manifest_path):
+        with open(manifest_path, "w") as f:
+            json.dump(self.names, f, indent=1, sort_keys=True)
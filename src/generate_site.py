@@ -1,6 +1,30 @@
-from os import listdir, path, mkdir
-from shutil import rmtree, copy
-from textnode import markdown_to_html_node
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from contextlib import ExitStack
+import mmap
+from os import path, makedirs, remove, scandir, stat, link
+from shutil import rmtree, copy, copy2
+from hashlib import file_digest
+from time import perf_counter
+from textnode import markdown_to_blocks, block_to_block_type, block_to_html, UrlRewriter, iter_blocks, iter_block_spans, MarkdownStream, markdown_to_html_node
+from htmlnode import ParentNode
+from template import load_template
+from profiler import StageTimer
+from pageio import PageIO, make_dirs, write_output
+from postprocess import COMPRESSIBLE, minify_html, gzip_bytes, gzip_file, open_gzip_text, TeeWriter
+from directives import Directives
+from fingerprint import AssetManifest, hashed_name
+from shard import SHARD_MANIFEST, MERGE_MANIFEST, shard_pages
+from deps import load_graph, save_graph, page_edges, outdated, broken_links, report_broken_links, PartialHashes
+from site_index import text_terms, node_terms, page_url, write_sitemap, write_feed, write_search_index
+from console import log, set_verbosity, VERBOSE
+import console
+
+STREAM_THRESHOLD = 8 * 1024 * 1024
+RELEASE_CHUNK = 4 * 1024 * 1024
+IO_THREADS = 4
+SITE_FILES = ["sitemap.xml", "feed.xml", "search.json"]
 
 def extract_title(markdown):
     for line in markdown.split("\n"):
@@ -9,62 +33,738 @@ def extract_title(markdown):
 
     raise Exception("There is no title in the file")
 
+def extract_front_matter(markdown):
+    if not markdown.startswith("---\n"):
+        return {}, markdown
+    end = markdown.find("\n---\n", 3)
+    if end == -1:
+        return {}, markdown
+
+    front_matter = {}
+    for line in markdown[4:end].split("\n"):
+        key, separator, value = line.partition(":")
+        if separator:
+            front_matter[key.strip().lower()] = value.strip()
+    return front_matter, markdown[end + 5:]
+
+def read_front_matter(f):
+    start = f.tell()
+    if f.readline() != "---\n":
+        f.seek(start)
+        return {}
+
+    front_matter = {}
+    line = f.readline()
+    while line:
+        if line == "---\n":
+            return front_matter
+        key, separator, value = line.partition(":")
+        if separator:
+            front_matter[key.strip().lower()] = value.strip()
+        line = f.readline()
+    f.seek(start)
+    return {}
+
+def scan_title(f):
+    for line in f:
+        if line.startswith("# "):
+            return line.lstrip("#").strip()
+
+    raise Exception("There is no title in the file")
+
+class MappedSource:
+    def __init__(self, from_path):
+        with open(from_path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.has_carriage_returns = self.find_carriage_return()
+        self.body_start = 0
+
+    def find_carriage_return(self):
+        for start in range(0, len(self.buffer), RELEASE_CHUNK):
+            found = self.buffer.find(b"\r", start, start + RELEASE_CHUNK) != -1
+            self.release(min(start + RELEASE_CHUNK, len(self.buffer)))
+            if found:
+                return True
+        return False
+
+    def release(self, end):
+        # drop pages already scanned so resident memory does not grow with the file
+        if hasattr(mmap, "MADV_DONTNEED"):
+            self.buffer.madvise(mmap.MADV_DONTNEED, 0, end)
+
+    def front_matter(self):
+        if self.buffer[:4] != b"---\n":
+            return {}
+        end = self.buffer.find(b"\n---\n", 3)
+        if end == -1:
+            return {}
+        self.body_start = end + 5
+        return extract_front_matter(self.buffer[:self.body_start].decode())[0]
+
+    def title(self):
+        if self.buffer[self.body_start:self.body_start + 2] == b"# ":
+            line_start = self.body_start
+        else:
+            line_start = self.buffer.find(b"\n# ", self.body_start) + 1
+            if line_start == 0:
+                raise Exception("There is no title in the file")
+        line_end = self.buffer.find(b"\n", line_start)
+        return self.buffer[line_start:line_end if line_end != -1 else len(self.buffer)].decode().lstrip("#").strip()
+
+    def blocks(self):
+        released = 0
+        for start, end in iter_block_spans(self.buffer, self.body_start):
+            block = self.buffer[start:end].decode().strip()
+            if block:
+                yield block
+            if end - released > RELEASE_CHUNK:
+                released = end - end % mmap.PAGESIZE
+                self.release(released)
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
 def clear_path(dest_path):
     if path.exists(dest_path):
         rmtree(dest_path)
-    mkdir(dest_path)
-
-def copy_static_content(static_path, dest_path, inner_path=""):
-    for element in listdir(static_path):
-        element_path = f"{static_path}{element}"
-        if not path.isfile(element_path):
-            if not path.exists(f"{dest_path}{inner_path}{element}"):
-                mkdir(f"{dest_path}{inner_path}{element}")
-            new_path = f"{inner_path}{element}/"
-            copy_static_content(f"{element_path}/", dest_path, new_path)
-        else:
-            print(element_path, f"{dest_path}{inner_path}")
-            copy(element_path, f"{dest_path}{inner_path}")
+    makedirs(dest_path)
+
+def copy_static_content(static_path, dest_path):
+    for inner_path, _ in scan_files(static_path):
+        makedirs(path.dirname(f"{dest_path}{inner_path}"), exist_ok=True)
+        log(f"Copying {static_path}{inner_path} to {dest_path}{inner_path}", VERBOSE)
+        copy(f"{static_path}{inner_path}", f"{dest_path}{inner_path}")
 
 def static_configuration(static_src, dest_path):
     clear_path(dest_path)
     copy_static_content(static_src, dest_path)
 
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for element in listdir(dir_path_content):
-        element_path = f"{dir_path_content}{element}"
-        if not path.isfile(element_path):
-            print(element_path)
-            if not path.exists(f"{dest_dir_path}{element}"):
-                mkdir(f"{dest_dir_path}{element}")
-            generate_page_recursive(f"{element_path}/", template_path, f"{dest_dir_path}{element}/", basepath)
+def scan_files(dir_path, inner_path=""):
+    with scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                yield from scan_files(entry.path, f"{inner_path}{entry.name}/")
+            else:
+                yield f"{inner_path}{entry.name}", entry.stat()
+
+def sync_static_file(source_path, dest_path):
+    if path.lexists(dest_path):
+        remove(dest_path)
+    try:
+        link(source_path, dest_path)
+    except OSError:
+        copy2(source_path, dest_path)
+
+def sync_static_content(static_path, dest_path, synced=None, profiler=None):
+    synced = synced or {}
+    current = {}
+    for inner_path, file_stat in scan_files(static_path):
+        current[inner_path] = [file_stat.st_size, file_stat.st_mtime_ns]
+        file_dest = f"{dest_path}{inner_path}"
+        if synced.get(inner_path) == current[inner_path] and path.exists(file_dest):
+            continue
+        makedirs(path.dirname(file_dest), exist_ok=True)
+        log(f"Syncing {static_path}{inner_path} to {file_dest}", VERBOSE)
+        started = perf_counter()
+        sync_static_file(f"{static_path}{inner_path}", file_dest)
+        if profiler:
+            profiler.add_static(f"{static_path}{inner_path}", perf_counter() - started)
+
+    for inner_path in synced:
+        if inner_path not in current and path.exists(f"{dest_path}{inner_path}"):
+            log(f"Removing {dest_path}{inner_path} (no longer in {static_path})", VERBOSE)
+            remove(f"{dest_path}{inner_path}")
+    return current
+
+def precompress_static(static_path, dest_path, files, compressed, level, jobs=1):
+    current = {}
+    pending = []
+    for inner_path, signature in files.items():
+        if path.splitext(inner_path)[1].lower() not in COMPRESSIBLE:
+            continue
+        previous = compressed.get(inner_path)
+        exists = path.exists(f"{dest_path}{inner_path}.gz")
+        if previous and previous[:2] == signature and exists:
+            current[inner_path] = previous
+            continue
+        digest = hash_file(f"{static_path}{inner_path}")
+        current[inner_path] = signature + [digest]
+        if previous and previous[2] == digest and exists:
+            continue
+        pending.append(inner_path)
+
+    for inner_path in pending:
+        log(f"Compressing {dest_path}{inner_path}", VERBOSE)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(gzip_file, [f"{static_path}{inner_path}" for inner_path in pending], [f"{dest_path}{inner_path}.gz" for inner_path in pending], repeat(level)))
+
+    for inner_path in compressed:
+        if inner_path not in current and path.exists(f"{dest_path}{inner_path}.gz"):
+            remove(f"{dest_path}{inner_path}.gz")
+    return current
+
+def fingerprint_static(static_path, dest_path, files, fingerprints, compressed=False):
+    current = {}
+    for inner_path, signature in files.items():
+        previous = fingerprints.get(inner_path)
+        if previous and previous[:2] == signature:
+            current[inner_path] = previous
         else:
-            element_type = element.split(".")
-            if element_type[1] == "md":
-                generate_page(element_path, template_path, f"{dest_dir_path}{element_type[0]}.html", basepath)
-            else: raise Exception(f"Invalid file type in {dir_path_content} directory")
+            current[inner_path] = signature + [hash_file(f"{static_path}{inner_path}")]
+        hashed_path = f"{dest_path}{hashed_name(inner_path, current[inner_path][2])}"
+        if not path.exists(hashed_path):
+            log(f"Fingerprinting {static_path}{inner_path} as {hashed_path}", VERBOSE)
+            sync_static_file(f"{static_path}{inner_path}", hashed_path)
+        if compressed and path.exists(f"{dest_path}{inner_path}.gz") and not path.exists(f"{hashed_path}.gz"):
+            copy2(f"{dest_path}{inner_path}.gz", f"{hashed_path}.gz")
+
+    for inner_path, previous in fingerprints.items():
+        if inner_path not in current or current[inner_path][2] != previous[2]:
+            remove_output(f"{dest_path}{hashed_name(inner_path, previous[2])}")
+    return current
+
+def remove_output(dest_path):
+    for output_path in (dest_path, f"{dest_path}.gz"):
+        if path.exists(output_path):
+            remove(output_path)
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def remove_output_variants(dest_dir_path, manifest):
+    # switching minification, compression or fingerprinting leaves outputs of the old kind behind,
+    # remove only those we wrote so unrelated files in dest_dir_path survive
+    stale_paths = [f"{page['dest']}.gz" for page in manifest["pages"].values()]
+    stale_paths.extend(f"{dest_dir_path}{inner_path}.gz" for inner_path in manifest.get("compressed", {}))
+    for inner_path, entry in manifest.get("fingerprints", {}).items():
+        stale_paths.extend(f"{dest_dir_path}{hashed_name(inner_path, entry[2])}{suffix}" for suffix in ("", ".gz"))
+    stale_paths.extend(f"{dest_dir_path}{name}.gz" for name in SITE_FILES)
+    stale_paths.append(f"{dest_dir_path}assets.json")
+    for stale_path in stale_paths:
+        if path.exists(stale_path):
+            log(f"Removing {stale_path} (output options changed)", VERBOSE)
+            remove(stale_path)
+
+def hash_file(file_path):
+    with open(file_path, "rb") as f:
+        return file_digest(f, "sha256").hexdigest()
+
+def load_manifest(manifest_path):
+    if not path.exists(manifest_path):
+        return {"template": None, "basepath": None, "output": {}, "pages": {}, "static": {}, "compressed": {}, "fingerprints": {}, "site_files": []}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(manifest_path, manifest):
+    makedirs(path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+def page_index_path(manifest_path):
+    return path.join(path.dirname(manifest_path), "pages.json")
+
+def load_page_index(index_path):
+    if not path.exists(index_path):
+        return {}
+    with open(index_path) as f:
+        return json.load(f)
+
+def save_page_index(index_path, index):
+    makedirs(path.dirname(index_path), exist_ok=True)
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+def read_page_values(from_path):
+    with open(from_path) as f:
+        values = read_front_matter(f)
+        if "title" not in values:
+            values["title"] = scan_title(f)
+        return values
+
+def read_page_terms(from_path, directives=None):
+    deps = {}
+    expand = (lambda blocks: directives.expand_blocks(blocks, deps)) if directives is not None else iter
+    if stat(from_path).st_size > STREAM_THRESHOLD:
+        with MappedSource(from_path) as source:
+            if not source.has_carriage_returns:
+                values = source.front_matter()
+                title = values["title"] if "title" in values else source.title()
+                return sorted(block_terms(expand(source.blocks()), text_terms(title)))
+        values = read_page_values(from_path)
+        with open(from_path) as f:
+            read_front_matter(f)
+            return sorted(block_terms(expand(iter_blocks(f)), text_terms(values["title"])))
 
     with open(from_path) as f:
         md_contents = f.read()
-    f.close()
+    if directives is not None:
+        md_contents = directives.expand(md_contents, deps)
+    values, md_contents = extract_front_matter(md_contents)
+    title = values["title"] if "title" in values else extract_title(md_contents)
+    return sorted(node_terms(markdown_to_html_node(md_contents), text_terms(title)))
+
+def block_terms(blocks, terms):
+    for block in blocks:
+        node_terms(block_to_html(block), terms)
+    return terms
 
-    with open(template_path) as f:
-        template_contents = f.read()
-    f.close()
+def page_meta(values):
+    return {key: value for key, value in values.items() if key not in ("title", "content")}
 
-    html_node = markdown_to_html_node(md_contents)
-    html_contents = html_node.to_html()
+def scan_pages(dir_path_content, dest_dir_path, index=None):
+    index = index or {}
+    pages = {}
+    for inner_path, file_stat in scan_files(dir_path_content):
+        name, extension = path.splitext(inner_path)
+        if extension != ".md":
+            continue
+        from_path = f"{dir_path_content}{inner_path}"
+        page = {"dest": f"{dest_dir_path}{name}.html", "size": file_stat.st_size, "mtime": file_stat.st_mtime_ns}
+        cached = index.get(from_path)
+        if cached and cached["size"] == page["size"] and cached["mtime"] == page["mtime"]:
+            # shard builds keep pages owned by other shards without hashing them
+            page.update((key, cached[key]) for key in ("hash", "title", "meta") if key in cached)
+        pages[from_path] = page
+    return pages
 
-    page_title = extract_title(md_contents)
+def graph_path(manifest_path):
+    return path.join(path.dirname(manifest_path), "deps.json")
 
-    titled_contents = template_contents.replace("{{ Title }}", page_title)
-    page_with_content = titled_contents.replace("{{ Content }}", html_contents)
-    href_changed = page_with_content.replace("href=\"/", f"href=\"{basepath}")
-    page_updated = href_changed.replace("src=\"/", f"src=\"{basepath}")
+def site_pages(index, dest_dir_path):
+    return {from_path: {"url": page_url(page["dest"], dest_dir_path, "/"), "title": page.get("title")} for from_path, page in index.items()}
+
+def search_terms_path(manifest_path):
+    return path.join(path.dirname(manifest_path), "search_terms.json")
+
+def update_search_terms(terms_path, index, rendered_terms, directives=None):
+    cached = load_page_index(terms_path)
+    terms = {}
+    for from_path, page in index.items():
+        if from_path in rendered_terms:
+            terms[from_path] = {"hash": page["hash"], "terms": rendered_terms[from_path]}
+        elif from_path in cached and cached[from_path]["hash"] == page["hash"]:
+            terms[from_path] = cached[from_path]
+        else:
+            terms[from_path] = {"hash": page["hash"], "terms": read_page_terms(from_path, directives)}
+    makedirs(path.dirname(terms_path), exist_ok=True)
+    with open(terms_path, "w") as f:
+        json.dump(terms, f, separators=(",", ":"), sort_keys=True)
+    return {from_path: entry["terms"] for from_path, entry in terms.items()}
+
+def site_index_pages(dest_dir_path, basepath, index, search_terms=None):
+    pages = [
+        {"source": from_path, "url": page_url(page["dest"], dest_dir_path, basepath), "title": page["title"], "meta": page["meta"], "mtime": page["mtime"]}
+        for from_path, page in index.items()
+    ]
+    if search_terms is not None:
+        for page in pages:
+            page["terms"] = search_terms[page["source"]]
+    return pages
+
+def write_site_index(dest_dir_path, basepath, index, site_url=None, search_terms=None, gzip_level=None):
+    return write_site_files(dest_dir_path, basepath, site_index_pages(dest_dir_path, basepath, index, search_terms), site_url, search_terms is not None, gzip_level)
+
+def write_site_files(dest_dir_path, basepath, pages, site_url=None, search_index=False, gzip_level=None):
+    written = []
+    if site_url:
+        write_sitemap(f"{dest_dir_path}sitemap.xml", pages, site_url)
+        write_feed(f"{dest_dir_path}feed.xml", pages, site_url, basepath)
+        written.extend(["sitemap.xml", "feed.xml"])
+    if search_index:
+        write_search_index(f"{dest_dir_path}search.json", pages)
+        written.append("search.json")
+    if gzip_level is not None:
+        for name in list(written):
+            gzip_file(f"{dest_dir_path}{name}", f"{dest_dir_path}{name}.gz", gzip_level)
+            written.append(f"{name}.gz")
+    return written
+
+def fill_page_titles(index):
+    for from_path, page in index.items():
+        if "title" not in page:
+            try:
+                values = read_page_values(from_path)
+            except Exception as e:
+                raise Exception(f"Failed to read the title of {from_path}: {e}") from e
+            page["title"] = values["title"]
+            page["meta"] = page_meta(values)
+
+def save_shard_manifest(shard_manifest_path, shard_manifest):
+    with open(shard_manifest_path, "w") as f:
+        json.dump(shard_manifest, f, separators=(",", ":"), sort_keys=True)
+
+def load_shard_manifest(shard_dir_path):
+    shard_manifest_path = f"{shard_dir_path}{SHARD_MANIFEST}"
+    if not path.exists(shard_manifest_path):
+        raise Exception(f"{shard_dir_path} is not a shard build, {SHARD_MANIFEST} is missing")
+    with open(shard_manifest_path) as f:
+        return json.load(f)
+
+def merge_shards(shard_dir_paths, dest_dir_path):
+    shard_manifests = [load_shard_manifest(shard_dir_path) for shard_dir_path in shard_dir_paths]
+    count = shard_manifests[0]["shard"][1]
+    numbers = sorted(shard_manifest["shard"][0] for shard_manifest in shard_manifests)
+    if numbers != list(range(1, count + 1)) or any(shard_manifest["shard"][1] != count for shard_manifest in shard_manifests):
+        raise Exception(f"Expected shards 1 to {count} of {count} once each, got {', '.join(f'{a}/{b}' for a, b in (m['shard'] for m in shard_manifests))}")
+    settings = {key: shard_manifests[0][key] for key in ("basepath", "site_url", "search_index", "gzip_level")}
+    for shard_dir_path, shard_manifest in zip(shard_dir_paths, shard_manifests):
+        if any(shard_manifest[key] != value for key, value in settings.items()):
+            raise Exception(f"{shard_dir_path} was built with different options than {shard_dir_paths[0]}")
+
+    merge_manifest_path = f"{dest_dir_path}{MERGE_MANIFEST}"
+    previous = load_page_index(merge_manifest_path)
+    makedirs(dest_dir_path, exist_ok=True)
+    merged = set()
+    pages = []
+    for shard_dir_path, shard_manifest in zip(shard_dir_paths, shard_manifests):
+        for inner_path, _ in scan_files(shard_dir_path):
+            # every shard carries the same static files, the first copy wins
+            if inner_path == SHARD_MANIFEST or inner_path in merged:
+                continue
+            merged.add(inner_path)
+            file_dest = f"{dest_dir_path}{inner_path}"
+            makedirs(path.dirname(file_dest), exist_ok=True)
+            sync_static_file(f"{shard_dir_path}{inner_path}", file_dest)
+        pages.extend(shard_manifest["pages"])
+    merged.update(write_site_files(dest_dir_path, settings["basepath"], pages, settings["site_url"], settings["search_index"], settings["gzip_level"]))
+
+    # only files an earlier merge wrote are removed, anything else in dest_dir_path is left alone
+    for inner_path in previous:
+        if inner_path not in merged and path.exists(f"{dest_dir_path}{inner_path}"):
+            log(f"Removing {dest_dir_path}{inner_path} (no longer in any shard)", VERBOSE)
+            remove(f"{dest_dir_path}{inner_path}")
+    with open(merge_manifest_path, "w") as f:
+        json.dump(sorted(merged), f, separators=(",", ":"))
+    log(f"Merged {len(pages)} pages from {len(shard_dir_paths)} shards into {dest_dir_path}")
+    return pages
+
+def collect_pages(dir_path_content, dest_dir_path):
+    return [(from_path, page["dest"]) for from_path, page in scan_pages(dir_path_content, dest_dir_path).items()]
+
+def generate_page_recursive(dir_path_content, template_path, dest_dir_path, basepath, io_threads=IO_THREADS):
+    template = load_template(template_path)
+    template.rebase(basepath)
+    settings = RenderSettings(template, basepath)
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    make_dirs(dest_path for _, dest_path in pages)
+    if not io_threads:
+        for from_path, dest_path in pages:
+            generate_page(from_path, dest_path, settings)
+        return
+    with PageIO(io_threads) as io:
+        sources = io.prefetch((from_path for from_path, _ in pages), STREAM_THRESHOLD)
+        for (from_path, dest_path), source in zip(pages, sources):
+            generate_page(from_path, dest_path, settings, source=source, writer=io)
+
+class RenderSettings:
+    def __init__(self, template, basepath="/", profile=False, block_cache=None, ast_cache=None, index_terms=False, minify=False, gzip_level=None, directives=None, assets=None):
+        self.template = template
+        self.basepath = basepath
+        self.profile = profile
+        self.block_cache = block_cache
+        self.ast_cache = ast_cache
+        self.index_terms = index_terms
+        self.minify = minify
+        self.gzip_level = gzip_level
+        self.directives = directives
+        self.assets = assets
+
+worker_settings = None
+
+def init_worker(settings, level):
+    global worker_settings
+    worker_settings = settings
+    set_verbosity(level)
+
+def render_page(from_path, dest_path, settings=None, source=None, writer=None):
+    settings = settings or worker_settings
+    timer = StageTimer(settings.profile)
+    block_cache = settings.block_cache
+    hits, misses = (block_cache.hits, block_cache.misses) if block_cache else (0, 0)
+    try:
+        page = generate_page(from_path, dest_path, settings, timer, source, writer)
+    except Exception as e:
+        raise Exception(f"Failed to generate page from {from_path}: {e}") from e
+    page["stages"] = timer.stages
+    if block_cache:
+        page["cache_hits"] = block_cache.hits - hits
+        page["cache_misses"] = block_cache.misses - misses
+    return page
+
+def render_pages(pages, settings, jobs=1, profiler=None, io_threads=IO_THREADS):
+    if len(pages) < 2 or (jobs == 1 and not io_threads):
+        results = [render_page(from_path, dest_path, settings) for from_path, dest_path in pages]
+    elif jobs == 1:
+        with PageIO(io_threads) as io:
+            sources = io.prefetch((from_path for from_path, _ in pages), STREAM_THRESHOLD)
+            results = [render_page(from_path, dest_path, settings, source, io) for (from_path, dest_path), source in zip(pages, sources)]
+    else:
+        from_paths = [from_path for from_path, _ in pages]
+        dest_paths = [dest_path for _, dest_path in pages]
+        chunksize = max(1, len(pages) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(settings, console.verbosity)) as executor:
+            results = list(executor.map(render_page, from_paths, dest_paths, chunksize=chunksize))
+
+    if profiler:
+        for page in results:
+            profiler.add_page(page["source"], page["stages"])
+            profiler.add_cache(page.get("cache_hits", 0), page.get("cache_misses", 0))
+    return results
+
+def build_site(static_src, dir_path_content, template_path, dest_dir_path, basepath, manifest_path, full_rebuild=False, jobs=1, profiler=None, block_cache=None, block_cache_path=None, ast_cache=None, io_threads=IO_THREADS, site_url=None, search_index=False, minify=False, gzip_level=None, partials_path=None, strict_links=False, fingerprint=False, shard=None):
+    manifest = load_manifest(manifest_path)
+    template_hash = hash_file(template_path)
+    output = {"minify": minify, "gzip_level": gzip_level} if minify or gzip_level is not None else {}
+    if fingerprint:
+        output["fingerprint"] = True
+    output_changed = manifest.get("output", {}) != output
+    rerender_all = full_rebuild or output_changed or manifest["template"] != template_hash or manifest["basepath"] != basepath
+
+    if full_rebuild:
+        clear_path(dest_dir_path)
+        manifest["static"] = {}
+        manifest["compressed"] = {}
+    else:
+        makedirs(dest_dir_path, exist_ok=True)
+        if output_changed:
+            remove_output_variants(dest_dir_path, manifest)
+            manifest["compressed"] = {}
+            manifest["fingerprints"] = {}
+    static = sync_static_content(static_src, dest_dir_path, manifest.get("static"), profiler)
+    compressed = {}
+    if gzip_level is not None:
+        compressed = precompress_static(static_src, dest_dir_path, static, manifest.get("compressed", {}), gzip_level, jobs)
+    fingerprints = {}
+    assets = None
+    changed_assets = set()
+    if fingerprint:
+        previous = manifest.get("fingerprints", {})
+        fingerprints = fingerprint_static(static_src, dest_dir_path, static, previous, gzip_level is not None)
+        assets = AssetManifest({inner_path: hashed_name(inner_path, entry[2]) for inner_path, entry in fingerprints.items()})
+        assets.save(f"{dest_dir_path}assets.json")
+        changed_assets = {inner_path for inner_path in fingerprints.keys() | previous.keys() if inner_path not in fingerprints or inner_path not in previous or fingerprints[inner_path][2] != previous[inner_path][2]}
+
+    template = load_template(template_path)
+    template.rebase(basepath, assets)
+    # every page links the assets named in the template
+    rerender_all = rerender_all or bool(template.assets & changed_assets)
+
+    index_path = page_index_path(manifest_path)
+    index_written = stat(index_path).st_mtime_ns if path.exists(index_path) else 0
+    # a source changed within the same clock tick as the index was written can keep its size and mtime
+    trusted = {from_path: page for from_path, page in load_page_index(index_path).items() if page["mtime"] < index_written}
+    index = scan_pages(dir_path_content, dest_dir_path, trusted)
+    owned = shard_pages(index, dir_path_content, shard) if shard else index
+    # listings name pages this build may not render, so every page needs its title up front
+    fill_page_titles(index)
+
+    graph = load_graph(graph_path(manifest_path))
+    directives = Directives(dir_path_content, partials_path, site_pages(index, dest_dir_path))
+    partial_hashes = PartialHashes()
+    pages = {}
+    stale = []
+    for from_path, page in owned.items():
+        if "hash" not in page:
+            page["hash"] = hash_file(from_path)
+        pages[from_path] = {"hash": page["hash"], "dest": page["dest"]}
+        if not rerender_all and manifest["pages"].get(from_path) == pages[from_path] and path.exists(page["dest"]):
+            if from_path in graph and not outdated(graph[from_path], partial_hashes) and not changed_assets.intersection(graph[from_path]["assets"]):
+                continue
+        stale.append((from_path, page["dest"]))
+    graph = {from_path: edges for from_path, edges in graph.items() if from_path in owned}
+    url_sources = {page["url"]: from_path for from_path, page in directives.pages.items()}
+
+    if block_cache is not None and block_cache_path:
+        block_cache.load(block_cache_path)
+    rendered = {}
+    rendered_terms = {}
+    # pages with listings render after the pages they list, and again while a listing is out of date
+    pending = stale
+    while True:
+        wave = [entry for entry in pending if not graph.get(entry[0], {}).get("lists")] or pending
+        make_dirs(dest_path for _, dest_path in wave)
+        settings = RenderSettings(
+            template, basepath, profile=profiler is not None, block_cache=block_cache, ast_cache=ast_cache, index_terms=search_index,
+            minify=minify, gzip_level=gzip_level, directives=directives, assets=assets,
+        )
+        for page in render_pages(wave, settings, jobs, profiler, io_threads):
+            index[page["source"]]["title"] = page["title"]
+            index[page["source"]]["meta"] = page["meta"]
+            directives.pages[page["source"]]["title"] = page["title"]
+            graph[page["source"]] = page_edges(page, url_sources, static)
+            if "terms" in page:
+                rendered_terms[page["source"]] = page["terms"]
+            rendered[page["source"]] = True
+        done = {from_path for from_path, _ in wave}
+        pending = [entry for entry in pending if entry[0] not in done]
+        waiting = {from_path for from_path, _ in pending}
+        pending.extend((from_path, index[from_path]["dest"]) for from_path, edges in graph.items() if from_path not in waiting and outdated(edges, partial_hashes, directives))
+        if not pending:
+            break
+    if block_cache is not None and block_cache_path and jobs == 1:
+        block_cache.save(block_cache_path)
+
+    for from_path, page in manifest["pages"].items():
+        if from_path not in pages and path.exists(page["dest"]):
+            log(f"Removing {page['dest']} (source {from_path} was deleted)", VERBOSE)
+            remove_output(page["dest"])
+
+    save_page_index(index_path, index)
+    save_graph(graph_path(manifest_path), graph)
+    search_terms = update_search_terms(search_terms_path(manifest_path), owned, rendered_terms, directives) if search_index else None
+    site_files = []
+    if shard:
+        save_shard_manifest(f"{dest_dir_path}{SHARD_MANIFEST}", {
+            "shard": list(shard), "basepath": basepath, "site_url": site_url, "search_index": search_index, "gzip_level": gzip_level,
+            "pages": site_index_pages(dest_dir_path, basepath, owned, search_terms),
+        })
+    elif site_url or search_index:
+        site_files = write_site_index(dest_dir_path, basepath, index, site_url, search_terms, gzip_level)
+    for name in manifest.get("site_files", []):
+        if name not in site_files and path.exists(f"{dest_dir_path}{name}"):
+            log(f"Removing {dest_dir_path}{name} (no longer generated)", VERBOSE)
+            remove(f"{dest_dir_path}{name}")
+    save_manifest(manifest_path, {"template": template_hash, "basepath": basepath, "output": output, "pages": pages, "static": static, "compressed": compressed, "fingerprints": fingerprints, "site_files": site_files})
+    log(f"Rendered {len(rendered)} of {len(pages)} pages into {dest_dir_path}")
+    broken = broken_links(graph, url_sources, static)
+    report_broken_links(broken)
+    if broken and strict_links:
+        raise Exception(f"Broken links in {len(broken)} pages")
+    return list(rendered)
+
+def stream_page(from_path, template, dest_path, rewrite_url, terms=None, gzip_level=None, directives=None, deps=None, timer=None):
+    timer = timer or StageTimer(False)
+    on_node = (lambda node: node_terms(node, terms)) if terms is not None else None
+    expand = (lambda blocks: directives.expand_blocks(blocks, deps)) if directives is not None else iter
+    with ExitStack() as outputs:
+        with timer.stage("read"):
+            source = outputs.enter_context(MappedSource(from_path))
+        f = outputs.enter_context(open(dest_path, "w"))
+        if gzip_level is not None:
+            f = TeeWriter(f, outputs.enter_context(open_gzip_text(f"{dest_path}.gz", gzip_level)))
+        if source.has_carriage_returns:
+            return stream_page_lines(from_path, template, f, rewrite_url, on_node, expand, timer)
+        with timer.stage("read"):
+            values = source.front_matter()
+            if "title" not in values:
+                values["title"] = source.title()
+        values["content"] = MarkdownStream(expand(source.blocks()), rewrite_url, on_node)
+        # parsing, rendering and writing interleave block by block, so they are timed together
+        with timer.stage("streamed render"):
+            template.write(f, values)
+    return values
+
+def stream_page_lines(from_path, template, f, rewrite_url, on_node=None, expand=iter, timer=None):
+    timer = timer or StageTimer(False)
+    with timer.stage("read"):
+        values = read_page_values(from_path)
+    with open(from_path) as source:
+        read_front_matter(source)
+        values["content"] = MarkdownStream(expand(iter_blocks(source)), rewrite_url, on_node)
+        with timer.stage("streamed render"):
+            template.write(f, values)
+    return values
+
+def parse_page(md_contents, namespace, rewrite_url, timer, block_cache=None):
+    with timer.stage("read"):
+        values, md_contents = extract_front_matter(md_contents)
+        if "title" not in values:
+            values["title"] = extract_title(md_contents)
+
+    with timer.stage("markdown_to_blocks"):
+        blocks = markdown_to_blocks(md_contents)
+    with timer.stage("block typing"):
+        block_types = [block_to_block_type(block) for block in blocks]
+    with timer.stage("inline parsing"):
+        if block_cache is not None:
+            children = [block_cache.render(block, namespace, rewrite_url, block_type) for block, block_type in zip(blocks, block_types)]
+        else:
+            children = [block_to_html(block, rewrite_url, block_type) for block, block_type in zip(blocks, block_types)]
+    return values, ParentNode("div", children)
+
+def generate_page(from_path, dest_path, settings, timer=None, source=None, writer=None):
+    timer = timer or StageTimer(False)
+    template = settings.template
+    directives = settings.directives
+    index_terms = settings.index_terms
+    gzip_level = settings.gzip_level
+    log(f"Generating page from {from_path} to {dest_path} using {template.path}", VERBOSE)
+    rewrite_url = UrlRewriter(settings.basepath, settings.assets)
+    # cached html holds fingerprinted asset urls, so it is only valid for the same asset manifest
+    namespace = settings.basepath if settings.assets is None else f"{settings.basepath}\0{settings.assets.digest}"
+
+    page = {"source": from_path, "dest": dest_path}
+
+    md_contents = None
+    if source is not None:
+        with timer.stage("read"):
+            md_contents = source.result()
+    if md_contents is None:
+        if stat(from_path).st_size > STREAM_THRESHOLD:
+            terms = set() if index_terms else None
+            values = stream_page(from_path, template, dest_path, rewrite_url, terms, gzip_level, directives, page, timer)
+            page["title"] = values["title"]
+            page["meta"] = page_meta(values)
+            if index_terms:
+                page["terms"] = sorted(terms | text_terms(values["title"]))
+            page["urls"] = rewrite_url.urls
+            return page
+        with timer.stage("read"):
+            with open(from_path) as f:
+                md_contents = f.read()
+
+    if directives is not None:
+        with timer.stage("read"):
+            md_contents = directives.expand(md_contents, page)
+
+    cached = None
+    ast_cache = settings.ast_cache
+    if ast_cache is not None:
+        with timer.stage("ast cache"):
+            ast_key = ast_cache.key(md_contents, namespace)
+            cached = ast_cache.get(ast_key)
+
+    if cached:
+        values, html_node, urls = cached
+        rewrite_url.urls.update(urls)
+    else:
+        values, html_node = parse_page(md_contents, namespace, rewrite_url, timer, settings.block_cache)
+        if ast_cache is not None:
+            with timer.stage("ast cache"):
+                ast_cache.put(ast_key, values, html_node, rewrite_url.urls)
+    page["urls"] = rewrite_url.urls
+    page["title"] = values["title"]
+    page["meta"] = page_meta(values)
+    if index_terms:
+        page["terms"] = sorted(node_terms(html_node, text_terms(values["title"])))
+
+    if not timer.enabled and not settings.minify and gzip_level is None:
+        values["content"] = html_node
+        if writer is not None:
+            writer.write(dest_path, template.render(values))
+        else:
+            with open(dest_path, "w") as f:
+                template.write(f, values)
+        return page
 
-    with open(dest_path, "w") as f:
-        f.write(page_updated)
-    f.close()
\ No newline at end of file
+    with timer.stage("to_html"):
+        values["content"] = html_node.to_html()
+    with timer.stage("template fill"):
+        html = template.render(values)
+    outputs = [(dest_path, html)]
+    if settings.minify:
+        with timer.stage("minify"):
+            outputs[0] = (dest_path, minify_html(html))
+    if gzip_level is not None:
+        with timer.stage("gzip"):
+            outputs.append((f"{dest_path}.gz", gzip_bytes(outputs[0][1].encode(), gzip_level)))
+    with timer.stage("write"):
+        for output_path, data in outputs:
+            if writer is not None:
+                writer.write(output_path, data)
+            else:
+                write_output(output_path, data)
+    return page
@@ -1,4 +1,12 @@
+VERBATIM_CHUNK = 1024 * 1024
+
+def escape_html(text):
+    # chained replace skips strings without the character, str.translate is far slower on text that needs escaping
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self=None, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -7,6 +15,9 @@ class HTMLNode:
     
     def to_html(self):
         raise NotImplementedError
+
+    def write_html(self, fp):
+        raise NotImplementedError
     
     def props_to_html(self):
         if self.props:
@@ -14,12 +25,20 @@ class HTMLNode:
             return f" {'" '.join(map(lambda prop: '="'.join(prop), props_to_print))}\""
         return ""
     
+    def to_tuple(self):
+        raise NotImplementedError
+
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
     
     def to_html(self):
         if self.value == None:
@@ -28,9 +47,27 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def write_html(self, fp):
+        if self.value == None:
+            raise ValueError("invalid HTML: value required")
+        if self.tag == None:
+            fp.write(self.value)
+            return
+        fp.write(f"<{self.tag}{self.props_to_html()}>")
+        fp.write(self.value)
+        fp.write(f"</{self.tag}>")
+
+    def to_tuple(self):
+        return (0, self.tag, self.value, self.props)
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
     
     def to_html(self):
         if self.tag == None:
@@ -40,4 +77,54 @@ class ParentNode(HTMLNode):
         for child in self.children:
             if type(child) == LeafNode and child.value == None:
                 raise ValueError("invalid HTML: node child missing a value")
-        return f"<{self.tag}{self.props_to_html()}>{''.join(map(lambda child: child.to_html(), self.children))}</{self.tag}>"
\ No newline at end of file
+        return f"<{self.tag}{self.props_to_html()}>{''.join(map(lambda child: child.to_html(), self.children))}</{self.tag}>"
+
+    def write_html(self, fp):
+        if self.tag == None:
+            raise ValueError("invalid HTML: tag required")
+        if self.children is None:
+            raise ValueError("invalid HTML: no children")
+        fp.write(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            if type(child) == LeafNode and child.value == None:
+                raise ValueError("invalid HTML: node child missing a value")
+            child.write_html(fp)
+        fp.write(f"</{self.tag}>")
+
+    def to_tuple(self):
+        return (1, self.tag, self.props, tuple(child.to_tuple() for child in self.children))
+
+class VerbatimNode(HTMLNode):
+    __slots__ = ("inner_tag",)
+
+    def __init__(self, tag, value, props=None, inner_tag=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+        self.inner_tag = inner_tag
+
+    def open_tags(self):
+        return f"<{self.tag}{self.props_to_html()}><{self.inner_tag}>" if self.inner_tag else f"<{self.tag}{self.props_to_html()}>"
+
+    def close_tags(self):
+        return f"</{self.inner_tag}></{self.tag}>" if self.inner_tag else f"</{self.tag}>"
+
+    def to_html(self):
+        return f"{self.open_tags()}{escape_html(self.value)}{self.close_tags()}"
+
+    def write_html(self, fp):
+        fp.write(self.open_tags())
+        for start in range(0, len(self.value), VERBATIM_CHUNK):
+            fp.write(escape_html(self.value[start:start + VERBATIM_CHUNK]))
+        fp.write(self.close_tags())
+
+    def to_tuple(self):
+        return (2, self.tag, self.value, self.props, self.inner_tag)
+
+def node_from_tuple(data):
+    if data[0] == 0:
+        return LeafNode(data[1], data[2], data[3])
+    if data[0] == 2:
+        return VerbatimNode(data[1], data[2], data[3], data[4])
+    return ParentNode(data[1], [node_from_tuple(child) for child in data[3]], data[2])
@@ -1,11 +1,107 @@
 from textnode import *
 from htmlnode import *
 from generate_site import *
+from watch import watch
+from profiler import Profiler
+from cache import BlockCache, AstCache
+from console import set_verbosity, QUIET, NORMAL, VERBOSE
+from shard import parse_shard
+import argparse
 import sys
+from os import cpu_count
+
+def shard_argument(text):
+    try:
+        return parse_shard(text)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def directory_argument(text):
+    return text if text.endswith("/") else f"{text}/"
+
+def merge(argv):
+    parser = argparse.ArgumentParser(prog="main.py merge", description="Combine the outputs of --shard builds into one site")
+    parser.add_argument("shards", nargs="+", type=directory_argument, help="output directories of every shard build")
+    parser.add_argument("-o", "--output", type=directory_argument, default="./docs/", help="directory for the merged site (default ./docs/)")
+    args = parser.parse_args(argv)
+    merge_shards(args.shards, args.output)
 
 if __name__ == '__main__':
-    basepath = "/" if not sys.argv[1] else sys.argv[1]
+    if sys.argv[1:2] == ["merge"]:
+        merge(sys.argv[2:])
+        sys.exit()
+    parser = argparse.ArgumentParser(description="Build the site from ./content/ into ./docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--full", action="store_true", help="ignore the build manifest and rebuild every page")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="render pages across N processes (0 uses every core)")
+    parser.add_argument("--watch", action="store_true", help="serve ./docs/ and re-render pages as their sources change")
+    parser.add_argument("--port", type=int, default=8888, help="port used by --watch (default 8888)")
+    parser.add_argument("--profile", action="store_true", help="time every build stage and print the slowest pages")
+    parser.add_argument("--profile-json", metavar="PATH", help="also write the profile data to PATH as JSON")
+    parser.add_argument("--block-cache", action="store_true", help="reuse the rendered HTML of blocks repeated across pages")
+    parser.add_argument("--block-cache-entries", type=int, default=10000, help="maximum number of cached blocks (default 10000)")
+    parser.add_argument("--block-cache-bytes", type=int, default=64 * 1024 * 1024, help="maximum size of the cached blocks in bytes (default 64 MB)")
+    parser.add_argument("--persist-block-cache", action="store_true", help="keep the block cache in ./.cache/ between builds (implies --block-cache)")
+    parser.add_argument("--ast-cache", action="store_true", help="keep parsed pages in ./.cache/ast/ so unchanged sources skip markdown parsing")
+    parser.add_argument("--io-threads", type=int, default=IO_THREADS, help=f"threads that prefetch sources and write pages behind the renderer (0 disables, default {IO_THREADS})")
+    parser.add_argument("--site-url", help="absolute site URL (such as https://example.com), writes sitemap.xml and feed.xml")
+    parser.add_argument("--search-index", action="store_true", help="write a JSON inverted index of page words to search.json")
+    parser.add_argument("--minify", action="store_true", help="collapse whitespace in the generated HTML (pre, code, script and style are kept as is)")
+    parser.add_argument("--gzip-level", type=int, choices=range(1, 10), metavar="1-9", help="also write a .gz next to every page and compressible static file")
+    parser.add_argument("--fingerprint", action="store_true", help="also write static files under content-hashed names (listed in assets.json) and link pages to them")
+    parser.add_argument("--shard", type=shard_argument, metavar="i/N", help="render only shard i of N (from 1) and write shard.json for \"main.py merge\"")
+    parser.add_argument("-o", "--output", type=directory_argument, default="./docs/", help="directory for the generated site (default ./docs/)")
+    parser.add_argument("--strict-links", action="store_true", help="fail the build when a page links to a missing page or static file")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", action="store_const", dest="verbosity", const=QUIET, default=NORMAL, help="only report errors")
+    verbosity.add_argument("-v", "--verbose", action="store_const", dest="verbosity", const=VERBOSE, help="report every generated page and copied file")
+    args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    if args.io_threads < 0:
+        parser.error("--io-threads must be 0 or a positive number")
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint cannot be combined with --watch")
+    if args.shard and args.watch:
+        parser.error("--shard cannot be combined with --watch")
+
+    basepath = "/" if not args.basepath else args.basepath
     static_src = "./static/"
-    dest_path = "./docs/"
-    static_configuration(static_src, dest_path)
-    generate_page_recursive("./content/", "./template.html", dest_path, basepath)
\ No newline at end of file
+    dest_path = args.output
+    # shards keep separate manifests so several can be built from one checkout
+    manifest_path = f"./.cache/shard-{args.shard[0]}-of-{args.shard[1]}/manifest.json" if args.shard else "./.cache/manifest.json"
+    partials_path = "./partials/"
+    set_verbosity(args.verbosity)
+    profiler = Profiler() if args.profile or args.profile_json else None
+    block_cache = None
+    if args.block_cache or args.persist_block_cache:
+        block_cache = BlockCache(args.block_cache_entries, args.block_cache_bytes)
+    block_cache_path = "./.cache/blocks.marshal" if args.persist_block_cache else None
+    ast_cache = AstCache("./.cache/ast/") if args.ast_cache else None
+    site_url = args.site_url.rstrip("/") if args.site_url else None
+
+    if args.watch:
+        watch(static_src, "./content/", "./template.html", dest_path, basepath, manifest_path, port=args.port, minify=args.minify, gzip_level=args.gzip_level, partials_path=partials_path)
+    else:
+        build_site(
+            static_src, "./content/", "./template.html", dest_path, basepath, manifest_path,
+            full_rebuild=args.full,
+            jobs=args.jobs or cpu_count(),
+            profiler=profiler,
+            block_cache=block_cache,
+            block_cache_path=block_cache_path,
+            ast_cache=ast_cache,
+            io_threads=args.io_threads,
+            site_url=site_url,
+            search_index=args.search_index,
+            minify=args.minify,
+            gzip_level=args.gzip_level,
+            partials_path=partials_path,
+            strict_links=args.strict_links,
+            fingerprint=args.fingerprint,
+            shard=args.shard,
+        )
+        if args.profile:
+            print(profiler.report())
+        if args.profile_json:
+            profiler.save(args.profile_json)
@@ -0,0 +1,60 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os import path, makedirs, fstat
+from threading import BoundedSemaphore
+
+def make_dirs(file_paths):
+    for dir_path in sorted({path.dirname(file_path) for file_path in file_paths}):
+        if dir_path:
+            makedirs(dir_path, exist_ok=True)
+
+def read_source(file_path, max_size=None):
+    with open(file_path) as f:
+        if max_size is not None and fstat(f.fileno()).st_size > max_size:
+            return None
+        return f.read()
+
+def write_output(dest_path, data):
+    with open(dest_path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+
+class PageIO:
+    def __init__(self, threads=4, window=None):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="pageio")
+        self.window = window or threads * 2
+        self.pending_writes = BoundedSemaphore(self.window)
+        self.errors = []
+
+    def prefetch(self, file_paths, max_size=None):
+        pending = deque()
+        for file_path in file_paths:
+            pending.append(self.executor.submit(read_source, file_path, max_size))
+            if len(pending) > self.window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    def write(self, dest_path, data):
+        self.pending_writes.acquire()
+        future = self.executor.submit(write_output, dest_path, data)
+        future.add_done_callback(lambda future: self.write_done(dest_path, future))
+
+    def write_done(self, dest_path, future):
+        self.pending_writes.release()
+        if not future.cancelled() and future.exception() is not None:
+            self.errors.append((dest_path, future.exception()))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.errors:
+            dest_path, e = self.errors[0]
+            raise Exception(f"Failed to write {dest_path}: {e}") from e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.executor.shutdown(wait=True, cancel_futures=True)
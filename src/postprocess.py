@@ -0,0 +1,41 @@
+import gzip
+import re
+from io import TextIOWrapper
+
+COMPRESSIBLE = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".ico", ".wasm"}
+PRESERVED_PATTERN = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+BLOCK_GAP_PATTERN = re.compile(
+    r" ?(</?(?:html|head|body|meta|link|title|base|div|p|h[1-6]|ul|ol|li|blockquote|article|section|header|footer|nav|main|aside|hr|br|table|thead|tbody|tr|td|th|figure|figcaption)\b[^>]*>) ?",
+    re.IGNORECASE,
+)
+
+def minify_html(html):
+    parts = PRESERVED_PATTERN.split(html)
+    minified = []
+    for i in range(0, len(parts), 3):
+        text = WHITESPACE_PATTERN.sub(" ", parts[i])
+        minified.append(BLOCK_GAP_PATTERN.sub(r"\1", text))
+        if i + 1 < len(parts):
+            minified.append(parts[i + 1])
+    return "".join(minified).strip()
+
+def gzip_bytes(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def gzip_file(source_path, dest_path, level):
+    with open(source_path, "rb") as f:
+        data = f.read()
+    with open(dest_path, "wb") as f:
+        f.write(gzip_bytes(data, level))
+
+def open_gzip_text(dest_path, level):
+    return TextIOWrapper(gzip.GzipFile(dest_path, "wb", level, mtime=0), encoding="utf-8")
+
+class TeeWriter:
+    def __init__(self, *files):
+        self.files = files
+
+    def write(self, data):
+        for f in self.files:
+            f.write(data)
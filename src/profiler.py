@@ -0,0 +1,69 @@
+import json
+from contextlib import contextmanager
+from time import perf_counter
+
+PAGE_STAGES = ["read", "ast cache", "markdown_to_blocks", "block typing", "inline parsing", "to_html", "template fill", "minify", "gzip", "write", "streamed render"]
+
+class StageTimer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + perf_counter() - started
+
+class Profiler:
+    def __init__(self):
+        self.pages = {}
+        self.static = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add_cache(self, hits, misses):
+        self.cache_hits += hits
+        self.cache_misses += misses
+
+    def add_page(self, page, stages):
+        self.pages[page] = stages
+
+    def add_static(self, file_path, seconds):
+        self.static[file_path] = seconds
+
+    def stage_totals(self):
+        totals = {stage: 0 for stage in PAGE_STAGES}
+        for stages in self.pages.values():
+            for stage, seconds in stages.items():
+                totals[stage] = totals.get(stage, 0) + seconds
+        totals["static copy"] = sum(self.static.values())
+        return totals
+
+    def slowest_pages(self, count=10):
+        return sorted(self.pages.items(), key=lambda page: sum(page[1].values()), reverse=True)[:count]
+
+    def report(self, count=10):
+        lines = [f"Profiled {len(self.pages)} pages and {len(self.static)} static files", "", "Stage totals:"]
+        for stage, seconds in self.stage_totals().items():
+            lines.append(f"  {stage:<20} {seconds * 1000:>10.1f} ms")
+        if self.cache_hits or self.cache_misses:
+            lines.extend(["", f"Block cache: {self.cache_hits} hits, {self.cache_misses} misses"])
+        lines.extend(["", "Slowest pages:"])
+        for page, stages in self.slowest_pages(count):
+            lines.append(f"  {sum(stages.values()) * 1000:>10.1f} ms  {page}")
+        return "\n".join(lines)
+
+    def save(self, json_path):
+        with open(json_path, "w") as f:
+            json.dump({
+                "totals": self.stage_totals(),
+                "block_cache": {"hits": self.cache_hits, "misses": self.cache_misses},
+                "pages": self.pages,
+                "static": self.static,
+            }, f, indent=1)
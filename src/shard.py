@@ -0,0 +1,18 @@
+from hashlib import sha256
+
+SHARD_MANIFEST = "shard.json"
+MERGE_MANIFEST = "merge.json"
+
+def parse_shard(text):
+    number, _, count = text.partition("/")
+    if not number.isdigit() or not count.isdigit() or not 1 <= int(number) <= int(count):
+        raise Exception(f"Invalid shard {text}, expected i/N with 1 <= i <= N")
+    return int(number), int(count)
+
+def shard_of(inner_path, count):
+    # the content-relative path keeps the partition the same on every machine
+    return int.from_bytes(sha256(inner_path.encode()).digest()[:8], "big") % count + 1
+
+def shard_pages(index, dir_path_content, shard):
+    number, count = shard
+    return {from_path: page for from_path, page in index.items() if shard_of(from_path[len(dir_path_content):], count) == number}
@@ -0,0 +1,80 @@
+import json
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+FEED_SECTION = "blog/"
+WORD_PATTERN = re.compile(r"[^\W_]{2,}")
+TAG_PATTERN = re.compile(r"</?[A-Za-z][^>]*>")
+
+def text_terms(text):
+    return {word.lower() for word in WORD_PATTERN.findall(text)}
+
+def node_terms(node, terms=None):
+    terms = set() if terms is None else terms
+    if node.children is None:
+        value = node.value or ""
+        if node.tag is None and "<" in value:
+            value = TAG_PATTERN.sub(" ", value)
+        terms.update(text_terms(value))
+    else:
+        for child in node.children:
+            node_terms(child, terms)
+    return terms
+
+def page_url(dest_path, dest_dir_path, basepath):
+    url = dest_path[len(dest_dir_path):]
+    if url == "index.html" or url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return f"{basepath}{url}"
+
+def page_date(page):
+    try:
+        date = datetime.fromisoformat(page["meta"]["date"])
+    except (KeyError, ValueError):
+        return datetime.fromtimestamp(page["mtime"] / 1e9, timezone.utc)
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+def write_sitemap(sitemap_path, pages, site_url):
+    with open(sitemap_path, "w") as f:
+        f.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n")
+        f.write("<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">\n")
+        for page in sorted(pages, key=lambda page: page["url"]):
+            f.write(f"<url><loc>{escape(site_url + page['url'])}</loc><lastmod>{page_date(page).date().isoformat()}</lastmod></url>\n")
+        f.write("</urlset>\n")
+
+def feed_pages(pages, basepath, section=FEED_SECTION):
+    prefix = f"{basepath}{section}"
+    return sorted(
+        (page for page in pages if page["url"].startswith(prefix) and page["url"] != prefix),
+        key=lambda page: (page_date(page), page["url"]),
+        reverse=True,
+    )
+
+def write_feed(feed_path, pages, site_url, basepath):
+    items = feed_pages(pages, basepath)
+    title = next((page["title"] for page in pages if page["url"] == basepath), site_url)
+    with open(feed_path, "w") as f:
+        f.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n")
+        f.write("<rss version=\"2.0\"><channel>\n")
+        f.write(f"<title>{escape(title)}</title><link>{escape(site_url + basepath)}</link><description>{escape(title)}</description>\n")
+        for page in items:
+            link = escape(site_url + page["url"])
+            f.write(f"<item><title>{escape(page['title'])}</title><link>{link}</link><guid>{link}</guid><pubDate>{format_datetime(page_date(page))}</pubDate>")
+            if "description" in page["meta"]:
+                f.write(f"<description>{escape(page['meta']['description'])}</description>")
+            f.write("</item>\n")
+        f.write("</channel></rss>\n")
+
+def write_search_index(index_path, pages):
+    pages = sorted(pages, key=lambda page: page["url"])
+    postings = {}
+    for page_id, page in enumerate(pages):
+        for term in page["terms"]:
+            postings.setdefault(term, []).append(page_id)
+    with open(index_path, "w") as f:
+        json.dump({
+            "pages": [[page["url"], page["title"]] for page in pages],
+            "terms": {term: postings[term] for term in sorted(postings)},
+        }, f, separators=(",", ":"))
@@ -0,0 +1,53 @@
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{ *(\w+) *\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r"\b(href|src)=\"(/[^\"]*)\"")
+
+class Template:
+    def __init__(self, source, path=None):
+        self.path = path
+        segments = SLOT_PATTERN.split(source)
+        self.literals = segments[0::2]
+        self.slots = [slot.lower() for slot in segments[1::2]]
+        self.assets = set()
+
+    def rebase(self, basepath, assets=None):
+        if assets is not None:
+            self.literals = [URL_ATTRIBUTE_PATTERN.sub(lambda match: self.fingerprint(match, assets), literal) for literal in self.literals]
+        self.literals = [
+            literal.replace("href=\"/", f"href=\"{basepath}").replace("src=\"/", f"src=\"{basepath}")
+            for literal in self.literals
+        ]
+
+    def fingerprint(self, match, assets):
+        inner_path = assets.asset_path(match.group(2))
+        if inner_path is None:
+            return match.group(0)
+        self.assets.add(inner_path)
+        return f"{match.group(1)}=\"{assets.url(match.group(2))}\""
+
+    def write(self, fp, values):
+        for literal, slot in zip(self.literals, self.slots):
+            fp.write(literal)
+            value = values.get(slot, "")
+            if hasattr(value, "write_html"):
+                value.write_html(fp)
+            else:
+                fp.write(value)
+        fp.write(self.literals[-1])
+
+    def render(self, values):
+        parts = []
+        for literal, slot in zip(self.literals, self.slots):
+            parts.append(literal)
+            value = values.get(slot, "")
+            parts.append(value.to_html() if hasattr(value, "to_html") else value)
+        parts.append(self.literals[-1])
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"Template({self.path}, slots: {self.slots})"
+
+def load_template(template_path):
+    with open(template_path) as f:
+        return Template(f.read(), template_path)
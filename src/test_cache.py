@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+
+from cache import *
+from textnode import rebase_url, markdown_to_html_node, UrlRewriter
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_render_hits_and_misses(self):
+        cache = BlockCache()
+        first = cache.render("This is **bolded** [link](/a)", "/site/", lambda url: rebase_url(url, "/site/"))
+        second = cache.render("This is **bolded** [link](/a)", "/site/", lambda url: rebase_url(url, "/site/"))
+        self.assertEqual(first.to_html(), "<p>This is <b>bolded</b> <a href=\"/site/a\">link</a></p>")
+        self.assertEqual(second.to_html(), first.to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_render_replays_urls(self):
+        cache = BlockCache()
+        first = UrlRewriter("/site/")
+        cache.render("[a](/a) and ![b](/b.png)", "/site/", first)
+        second = UrlRewriter("/site/")
+        cache.render("[a](/a) and ![b](/b.png)", "/site/", second)
+        self.assertEqual(first.urls, {"/a", "/b.png"})
+        self.assertEqual(second.urls, {"/a", "/b.png"})
+        self.assertEqual(cache.hits, 1)
+
+    def test_namespace_separates_basepaths(self):
+        cache = BlockCache()
+        cache.render("[link](/a)", "/")
+        self.assertEqual(cache.render("[link](/a)", "/site/", lambda url: rebase_url(url, "/site/")).to_html(), "<p><a href=\"/site/a\">link</a></p>")
+        self.assertEqual(cache.misses, 2)
+
+    def test_evicts_by_entry_count(self):
+        cache = BlockCache(max_entries=2)
+        for block in ["one", "two", "three"]:
+            cache.render(block, "/")
+        self.assertEqual([block for _, block in cache.entries], ["two", "three"])
+        cache.render("two", "/")
+        cache.render("four", "/")
+        self.assertEqual([block for _, block in cache.entries], ["two", "four"])
+
+    def test_evicts_by_size(self):
+        cache = BlockCache(max_bytes=40)
+        cache.render("first block", "/")
+        cache.render("second block", "/")
+        self.assertEqual([block for _, block in cache.entries], ["second block"])
+        self.assertLessEqual(cache.size, 40)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BlockCache()
+            cache.render("# heading", "/")
+            cache.save(f"{tmp}/cache/blocks.marshal")
+            loaded = BlockCache()
+            loaded.load(f"{tmp}/cache/blocks.marshal")
+            self.assertEqual(loaded.render("# heading", "/").to_html(), "<h1>heading</h1>")
+            self.assertEqual((loaded.hits, loaded.misses), (1, 0))
+
+class TestAstCache(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AstCache(f"{tmp}/ast/")
+            node = markdown_to_html_node("# Title\n\nSome **bold** [link](/a)\n\n- one\n- two")
+            key = cache.key("# Title", "/")
+            self.assertIsNone(cache.get(key))
+            cache.put(key, {"title": "Title"}, node, ["/a"])
+            values, cached, urls = cache.get(key)
+            self.assertEqual(values, {"title": "Title"})
+            self.assertEqual(urls, ("/a",))
+            self.assertEqual(cached.to_html(), node.to_html())
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_includes_namespace(self):
+        cache = AstCache("ast/")
+        self.assertNotEqual(cache.key("[link](/a)", "/"), cache.key("[link](/a)", "/site/"))
+        self.assertEqual(cache.key("[link](/a)", "/"), cache.key("[link](/a)", "/"))
+
+if __name__ == "__main__":
+    unittest.main()
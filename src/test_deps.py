@@ -0,0 +1,58 @@
+import unittest
+
+from deps import *
+from directives import Directives
+
+
+class TestDeps(unittest.TestCase):
+    def setUp(self):
+        self.url_sources = {"/": "content/index.md", "/blog/tom/": "content/blog/tom/index.md", "/about.html": "content/about.md"}
+        self.static_files = {"images/tom.png": [1, 1]}
+
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url("/blog/tom", self.url_sources, self.static_files), ("links", "content/blog/tom/index.md"))
+        self.assertEqual(resolve_url("/blog/tom/index.html#top", self.url_sources, self.static_files), ("links", "content/blog/tom/index.md"))
+        self.assertEqual(resolve_url("/about.html?x=1", self.url_sources, self.static_files), ("links", "content/about.md"))
+        self.assertEqual(resolve_url("/about", self.url_sources, self.static_files), ("links", "content/about.md"))
+        self.assertEqual(resolve_url("/images/tom.png", self.url_sources, self.static_files), ("assets", "images/tom.png"))
+        self.assertIsNone(resolve_url("https://example.com/", self.url_sources, self.static_files))
+        self.assertIsNone(resolve_url("//cdn.example.com/a.js", self.url_sources, self.static_files))
+
+    def test_page_edges(self):
+        page = {"urls": ["/", "/images/tom.png", "/blog/tom", "/blog/tom/", "/missing"], "partials": {"partials/nav.md": "abc"}}
+        self.assertEqual(page_edges(page, self.url_sources, self.static_files), {
+            "partials": {"partials/nav.md": "abc"},
+            "lists": {},
+            "links": ["content/blog/tom/index.md", "content/index.md"],
+            "assets": ["images/tom.png"],
+            "broken": ["/missing"],
+        })
+
+    def test_broken_links(self):
+        graph = {
+            "content/index.md": {"links": ["content/blog/tom/index.md", "content/old.md"], "assets": ["images/tom.png"], "broken": ["/blog/tom/", "/later"]},
+            "content/about.md": {"links": [], "assets": ["images/gone.png"], "broken": []},
+            "content/blog/tom/index.md": {"links": ["content/index.md"], "assets": [], "broken": []},
+        }
+        self.assertEqual(broken_links(graph, self.url_sources, self.static_files), {
+            "content/index.md": ["/later", "removed page content/old.md"],
+            "content/about.md": ["removed file /images/gone.png"],
+        })
+
+    def test_dependents(self):
+        graph = {"a.md": {"partials": {"nav.md": "1"}}, "b.md": {"partials": {}}, "c.md": {"assets": ["x.png"]}}
+        self.assertEqual(dependents(graph, "partials", {"nav.md"}), {"a.md"})
+        self.assertEqual(dependents(graph, "assets", {"x.png"}), {"c.md"})
+
+    def test_outdated(self):
+        directives = Directives("content/", pages={"content/blog/a.md": {"url": "/blog/a.html", "title": "A"}})
+        edges = {"partials": {"missing.md": "1"}, "lists": {}}
+        self.assertTrue(outdated(edges, PartialHashes()))
+        edges = {"partials": {}, "lists": {"blog/": digest("- [A](/blog/a.html)")}}
+        self.assertFalse(outdated(edges, PartialHashes(), directives))
+        directives.pages["content/blog/a.md"]["title"] = "Renamed"
+        self.assertTrue(outdated(edges, PartialHashes(), directives))
+        self.assertFalse(outdated(edges, PartialHashes()))
+
+if __name__ == "__main__":
+    unittest.main()
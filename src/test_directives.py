@@ -0,0 +1,62 @@
+import unittest
+import tempfile
+from os import makedirs
+
+from directives import *
+
+
+class TestDirectives(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = f"{self.tmp.name}/"
+        makedirs(f"{self.root}partials/")
+        self.pages = {
+            "content/index.md": {"url": "/", "title": "Home"},
+            "content/blog/index.md": {"url": "/blog/", "title": "Blog"},
+            "content/blog/b/index.md": {"url": "/blog/b/", "title": "Second"},
+            "content/blog/a/index.md": {"url": "/blog/a/", "title": "First"},
+            "content/blog/c/index.md": {"url": "/blog/c/", "title": None},
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, contents):
+        with open(f"{self.root}{name}", "w") as f:
+            f.write(contents)
+
+    def test_include(self):
+        self.write("partials/nav.md", "{{ include links.md }}\n")
+        self.write("partials/links.md", "[Home](/)")
+        directives = Directives("content/", f"{self.root}partials/")
+        deps = {}
+        self.assertEqual(directives.expand("# Title\n\n{{ include nav.md }}\n\ntext {{ include nav.md }}", deps), "# Title\n\n[Home](/)\n\ntext {{ include nav.md }}")
+        self.assertEqual(sorted(deps["partials"]), [f"{self.root}partials/links.md", f"{self.root}partials/nav.md"])
+
+    def test_directives_in_code_blocks_are_kept(self):
+        self.write("partials/nav.md", "[Home](/)")
+        directives = Directives("content/", f"{self.root}partials/")
+        deps = {}
+        markdown = "```\n{{ include missing.md }}\n```\n\n{{ include nav.md }}\n\n```\n{{ pages blog/ }}\n```\n"
+        self.assertEqual(directives.expand(markdown, deps), "```\n{{ include missing.md }}\n```\n\n[Home](/)\n\n```\n{{ pages blog/ }}\n```\n")
+        self.assertEqual(list(directives.expand_blocks(["```\n{{ include missing.md }}\n```", "{{ include nav.md }}"], deps)), ["```\n{{ include missing.md }}\n```", "[Home](/)"])
+        self.assertNotIn("lists", deps)
+
+    def test_include_without_partials(self):
+        with self.assertRaises(Exception):
+            Directives("content/").expand("{{ include nav.md }}", {})
+
+    def test_recursive_include(self):
+        self.write("partials/loop.md", "{{ include loop.md }}")
+        with self.assertRaises(Exception):
+            Directives("content/", f"{self.root}partials/").expand("{{ include loop.md }}", {})
+
+    def test_listing(self):
+        directives = Directives("content/", pages=self.pages)
+        deps = {}
+        self.assertEqual(directives.expand("{{ pages blog/ }}", deps), "- [First](/blog/a/)\n- [Second](/blog/b/)")
+        self.assertEqual(deps["lists"], {"blog/": digest("- [First](/blog/a/)\n- [Second](/blog/b/)")})
+        self.assertEqual(directives.section_listing("blog"), directives.section_listing("blog/"))
+
+if __name__ == "__main__":
+    unittest.main()
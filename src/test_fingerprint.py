@@ -0,0 +1,25 @@
+import unittest
+
+from fingerprint import *
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_hashed_name(self):
+        self.assertEqual(hashed_name("images/tom.png", "3f9a2c1d55e0"), "images/tom.3f9a2c1d.png")
+        self.assertEqual(hashed_name("LICENSE", "3f9a2c1d55e0"), "LICENSE.3f9a2c1d")
+
+    def test_url(self):
+        assets = AssetManifest({"index.css": "index.3f9a2c1d.css", "images/tom.png": "images/tom.0123abcd.png"})
+        self.assertEqual(assets.url("/index.css"), "/index.3f9a2c1d.css")
+        self.assertEqual(assets.url("/images/tom.png#top"), "/images/tom.0123abcd.png#top")
+        self.assertEqual(assets.url("/images/tom.png?w=10"), "/images/tom.0123abcd.png?w=10")
+        self.assertEqual(assets.url("/blog/tom"), "/blog/tom")
+        self.assertEqual(assets.url("index.css"), "index.css")
+        self.assertEqual(assets.url("//index.css"), "//index.css")
+
+    def test_digest_follows_names(self):
+        self.assertEqual(AssetManifest({"a.css": "a.1.css"}).digest, AssetManifest({"a.css": "a.1.css"}).digest)
+        self.assertNotEqual(AssetManifest({"a.css": "a.1.css"}).digest, AssetManifest({"a.css": "a.2.css"}).digest)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,487 @@
+import unittest
+import io
+import json
+import gzip
+import tempfile
+from os import path, makedirs, remove
+from contextlib import redirect_stdout
+
+import generate_site
+from generate_site import *
+from profiler import Profiler
+from cache import BlockCache, AstCache
+from console import set_verbosity, QUIET, NORMAL
+
+
+class TestBuildSite(unittest.TestCase):
+    def setUp(self):
+        set_verbosity(QUIET)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = f"{self.tmp.name}/"
+        for directory in ["static/", "content/blog/", "docs/"]:
+            makedirs(f"{self.root}{directory}")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title><a href=\"/\">home</a>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/index.md", "# Blog\n\nPosts")
+
+    def tearDown(self):
+        set_verbosity(NORMAL)
+        self.tmp.cleanup()
+
+    def write(self, name, contents):
+        with open(f"{self.root}{name}", "w") as f:
+            f.write(contents)
+
+    def read(self, name):
+        with open(f"{self.root}{name}") as f:
+            return f.read()
+
+    def build(self, basepath="/", full_rebuild=False, jobs=1, profiler=None, block_cache=None, ast_cache=None, partials=False, strict_links=False, fingerprint=False, shard=None, dest="docs/", site_url=None, search_index=False):
+        return build_site(
+            f"{self.root}static/",
+            f"{self.root}content/",
+            f"{self.root}template.html",
+            f"{self.root}{dest}",
+            basepath,
+            f"{self.root}cache/manifest.json" if shard is None else f"{self.root}cache/{dest}manifest.json",
+            full_rebuild,
+            jobs,
+            profiler,
+            block_cache,
+            None,
+            ast_cache,
+            partials_path=f"{self.root}partials/" if partials else None,
+            strict_links=strict_links,
+            fingerprint=fingerprint,
+            shard=shard,
+            site_url=site_url,
+            search_index=search_index,
+        )
+
+    def test_first_build_renders_everything(self):
+        rendered = self.build()
+        self.assertEqual(len(rendered), 2)
+        self.assertEqual(self.read("docs/index.html"), "<title>Home</title><a href=\"/\">home</a><div><h1>Home</h1><p>Welcome</p></div>")
+        self.assertTrue(path.exists(f"{self.root}docs/index.css"))
+
+    def test_rebuild_only_changed_pages(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+        self.write("content/blog/index.md", "# Blog\n\nMore posts")
+        self.assertEqual(self.build(), [f"{self.root}content/blog/index.md"])
+        self.assertIn("More posts", self.read("docs/blog/index.html"))
+
+    def test_rebuild_missing_output(self):
+        self.build()
+        remove(f"{self.root}docs/index.html")
+        self.assertEqual(self.build(), [f"{self.root}content/index.md"])
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        remove(f"{self.root}content/blog/index.md")
+        self.build()
+        self.assertFalse(path.exists(f"{self.root}docs/blog/index.html"))
+        self.assertTrue(path.exists(f"{self.root}docs/index.html"))
+
+    def test_template_or_basepath_change_is_full_rebuild(self):
+        self.build()
+        self.write("template.html", "<a href=\"/\">{{ Title }}</a>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+        self.assertEqual(len(self.build("/site/")), 2)
+        self.assertTrue(self.read("docs/index.html").startswith("<a href=\"/site/\">Home</a>"))
+        self.assertEqual(len(self.build("/site/", full_rebuild=True)), 2)
+
+    def test_static_sync_copies_only_changes(self):
+        self.build()
+        self.write("static/extra.css", "p {}")
+        self.build()
+        self.assertEqual(self.read("docs/extra.css"), "p {}")
+        self.write("static/extra.css", "p { color: red }")
+        self.build()
+        self.assertEqual(self.read("docs/extra.css"), "p { color: red }")
+        remove(f"{self.root}static/extra.css")
+        self.build()
+        self.assertFalse(path.exists(f"{self.root}docs/extra.css"))
+        self.assertTrue(path.exists(f"{self.root}docs/index.css"))
+
+    def test_static_sync_keeps_unrelated_outputs(self):
+        self.write("docs/CNAME", "example.com")
+        synced = sync_static_content(f"{self.root}static/", f"{self.root}docs/")
+        self.assertEqual(list(synced), ["index.css"])
+        sync_static_content(f"{self.root}static/", f"{self.root}docs/", {"old.css": [1, 1], **synced})
+        self.assertEqual(self.read("docs/CNAME"), "example.com")
+
+    def test_output_options_change_keeps_unrelated_outputs(self):
+        self.write("docs/CNAME", "example.com")
+        self.build()
+        build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/", f"{self.root}cache/manifest.json", minify=True, gzip_level=6, fingerprint=True)
+        self.assertTrue(path.exists(f"{self.root}docs/index.html.gz"))
+        self.assertTrue(path.exists(f"{self.root}docs/index.css.gz"))
+        hashed = json.loads(self.read("docs/assets.json"))["index.css"]
+        self.assertEqual(len(self.build()), 2)
+        self.assertEqual(self.read("docs/CNAME"), "example.com")
+        for name in ["index.html.gz", "blog/index.html.gz", "index.css.gz", hashed, "assets.json"]:
+            self.assertFalse(path.exists(f"{self.root}docs/{name}"), name)
+        self.assertTrue(path.exists(f"{self.root}docs/index.css"))
+
+    def test_front_matter_fills_template_slots(self):
+        self.write("template.html", "<title>{{ Title }}</title><meta content=\"{{ Author }}\">{{ Content }}")
+        self.write("content/index.md", "---\nauthor: J.R.R. Tolkien\n---\n# Home\n\nWelcome")
+        self.build()
+        self.assertEqual(self.read("docs/index.html"), "<title>Home</title><meta content=\"J.R.R. Tolkien\"><div><h1>Home</h1><p>Welcome</p></div>")
+
+    def test_extract_front_matter(self):
+        self.assertEqual(extract_front_matter("---\nTitle: Custom\ndate: 2024-01-01\n---\n# Home"), ({"title": "Custom", "date": "2024-01-01"}, "# Home"))
+        self.assertEqual(extract_front_matter("# Home\n\n---\n"), ({}, "# Home\n\n---\n"))
+
+    def test_profiled_build_matches_streamed(self):
+        self.build()
+        streamed = self.read("docs/index.html")
+        profiler = Profiler()
+        self.build(full_rebuild=True, jobs=2, profiler=profiler)
+        self.assertEqual(self.read("docs/index.html"), streamed)
+        self.assertEqual(sorted(profiler.pages), [f"{self.root}content/blog/index.md", f"{self.root}content/index.md"])
+        self.assertIn("inline parsing", profiler.pages[f"{self.root}content/index.md"])
+        self.assertEqual(list(profiler.static), [f"{self.root}static/index.css"])
+
+    def test_profiled_build_streams_large_pages(self):
+        threshold = generate_site.STREAM_THRESHOLD
+        generate_site.STREAM_THRESHOLD = 0
+        try:
+            self.build()
+            streamed = self.read("docs/index.html")
+            profiler = Profiler()
+            self.build(full_rebuild=True, profiler=profiler)
+        finally:
+            generate_site.STREAM_THRESHOLD = threshold
+        self.assertEqual(self.read("docs/index.html"), streamed)
+        stages = profiler.pages[f"{self.root}content/index.md"]
+        self.assertEqual(sorted(stages), ["read", "streamed render"])
+
+    def test_streamed_large_page_matches_in_memory(self):
+        self.write("template.html", "<title>{{ Title }}</title><p>{{ Author }}</p>{{ Content }}")
+        self.write("content/index.md", "---\nauthor: Tolkien\n---\nIntro [home](/)\n\n# Home\n\n```\ncode\n```\n\n1. one\n2. two")
+        self.build()
+        in_memory = self.read("docs/index.html")
+        threshold = generate_site.STREAM_THRESHOLD
+        generate_site.STREAM_THRESHOLD = 0
+        try:
+            self.build(full_rebuild=True)
+        finally:
+            generate_site.STREAM_THRESHOLD = threshold
+        self.assertEqual(self.read("docs/index.html"), in_memory)
+        self.assertTrue(in_memory.startswith("<title>Home</title><p>Tolkien</p><div><p>Intro"))
+
+    def test_mapped_source(self):
+        self.write("content/big.md", "---\nauthor: Tolkien\n---\nIntro\n\n# Big é\n\n\n\n> quote\n")
+        with MappedSource(f"{self.root}content/big.md") as source:
+            self.assertEqual(source.front_matter(), {"author": "Tolkien"})
+            self.assertEqual(source.title(), "Big é")
+            self.assertEqual(list(source.blocks()), ["Intro", "# Big é", "> quote"])
+            self.assertFalse(source.has_carriage_returns)
+
+    def test_streamed_page_expands_directives(self):
+        makedirs(f"{self.root}partials/")
+        self.write("partials/nav.md", "[Home](/)\n\nSee the posts:")
+        self.write("content/blog/post.md", "# Post\n\nText")
+        self.write("content/blog/index.md", "# Blog\n\nIntro\n{{ include nav.md }}\n\n{{ pages blog/ }}")
+        self.build(partials=True)
+        in_memory = self.read("docs/blog/index.html")
+        in_memory_edges = json.loads(self.read("cache/deps.json"))[f"{self.root}content/blog/index.md"]
+        threshold = generate_site.STREAM_THRESHOLD
+        generate_site.STREAM_THRESHOLD = 0
+        try:
+            self.build(full_rebuild=True, partials=True)
+        finally:
+            generate_site.STREAM_THRESHOLD = threshold
+        self.assertEqual(self.read("docs/blog/index.html"), in_memory)
+        self.assertIn("<p>See the posts:</p><ul><li><a href=\"/blog/post.html\">Post</a></li></ul>", in_memory)
+        self.assertEqual(json.loads(self.read("cache/deps.json"))[f"{self.root}content/blog/index.md"], in_memory_edges)
+
+    def test_directives_in_code_blocks_are_not_expanded(self):
+        makedirs(f"{self.root}partials/")
+        self.write("content/index.md", "# Home\n\n```\n{{ include nav.md }}\n```")
+        self.build(partials=True)
+        in_memory = self.read("docs/index.html")
+        self.assertIn("<pre><code>\n{{ include nav.md }}\n</code></pre>", in_memory)
+        threshold = generate_site.STREAM_THRESHOLD
+        generate_site.STREAM_THRESHOLD = 0
+        try:
+            self.build(full_rebuild=True, partials=True)
+        finally:
+            generate_site.STREAM_THRESHOLD = threshold
+        self.assertEqual(self.read("docs/index.html"), in_memory)
+
+    def test_streamed_page_with_windows_newlines(self):
+        with open(f"{self.root}content/index.md", "w", newline="") as f:
+            f.write("# Home\r\n\r\nline one\r\nline two\r\n")
+        self.build()
+        in_memory = self.read("docs/index.html")
+        threshold = generate_site.STREAM_THRESHOLD
+        generate_site.STREAM_THRESHOLD = 0
+        try:
+            self.build(full_rebuild=True)
+        finally:
+            generate_site.STREAM_THRESHOLD = threshold
+        self.assertEqual(self.read("docs/index.html"), in_memory)
+        self.assertIn("<p>line one line two</p>", in_memory)
+
+    def test_block_cache_build(self):
+        self.write("content/blog/index.md", "# Blog\n\nWelcome")
+        self.build()
+        uncached = self.read("docs/blog/index.html")
+        profiler = Profiler()
+        self.build(full_rebuild=True, profiler=profiler, block_cache=BlockCache())
+        self.assertEqual(self.read("docs/blog/index.html"), uncached)
+        self.assertEqual((profiler.cache_hits, profiler.cache_misses), (1, 3))
+
+    def test_ast_cache_reused_on_template_change(self):
+        ast_cache = AstCache(f"{self.root}cache/ast/")
+        self.build(ast_cache=ast_cache)
+        self.assertEqual((ast_cache.hits, ast_cache.misses), (0, 2))
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.build(ast_cache=ast_cache)
+        self.assertEqual((ast_cache.hits, ast_cache.misses), (2, 2))
+        self.assertEqual(self.read("docs/index.html"), "<main><div><h1>Home</h1><p>Welcome</p></div></main>")
+
+    def test_scan_pages(self):
+        self.write("content/blog/v1.2.md", "# Release")
+        self.write("content/blog/notes.txt", "not markdown")
+        pages = scan_pages(f"{self.root}content/", f"{self.root}docs/")
+        self.assertEqual(sorted(pages), [f"{self.root}content/blog/index.md", f"{self.root}content/blog/v1.2.md", f"{self.root}content/index.md"])
+        self.assertEqual(pages[f"{self.root}content/blog/v1.2.md"]["dest"], f"{self.root}docs/blog/v1.2.html")
+        self.assertNotIn("hash", pages[f"{self.root}content/index.md"])
+
+    def test_page_index_reuses_unchanged_entries(self):
+        self.build()
+        index = load_page_index(f"{self.root}cache/pages.json")
+        self.assertEqual(index[f"{self.root}content/blog/index.md"]["title"], "Blog")
+        pages = scan_pages(f"{self.root}content/", f"{self.root}docs/", index)
+        self.assertEqual(pages, index)
+        self.write("content/blog/index.md", "# Renamed\n\nWelcome back")
+        pages = scan_pages(f"{self.root}content/", f"{self.root}docs/", index)
+        self.assertNotIn("title", pages[f"{self.root}content/blog/index.md"])
+        self.build()
+        self.assertEqual(load_page_index(f"{self.root}cache/pages.json")[f"{self.root}content/blog/index.md"]["title"], "Renamed")
+
+    def test_site_index_outputs(self):
+        self.write("content/blog/first.md", "---\ndate: 2025-01-02\ndescription: The first post\n---\n# First\n\nHobbit **holes**")
+        build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/site/", f"{self.root}cache/manifest.json", site_url="https://example.com", search_index=True)
+        self.assertIn("<loc>https://example.com/site/blog/first.html</loc>", self.read("docs/sitemap.xml"))
+        feed = self.read("docs/feed.xml")
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<item><title>First</title><link>https://example.com/site/blog/first.html</link>", feed)
+        self.assertIn("<pubDate>Thu, 02 Jan 2025 00:00:00 +0000</pubDate><description>The first post</description>", feed)
+        index = json.loads(self.read("docs/search.json"))
+        first = [url for url, _ in index["pages"]].index("/site/blog/first.html")
+        self.assertEqual(index["terms"]["hobbit"], [first])
+
+        self.write("content/blog/index.md", "# Blog\n\nHobbit posts")
+        rendered = build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/site/", f"{self.root}cache/manifest.json", site_url="https://example.com", search_index=True)
+        self.assertEqual(rendered, [f"{self.root}content/blog/index.md"])
+        index = json.loads(self.read("docs/search.json"))
+        self.assertEqual(len(index["terms"]["hobbit"]), 2)
+
+    def test_minified_and_compressed_outputs(self):
+        build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/", f"{self.root}cache/manifest.json", minify=True, gzip_level=6)
+        html = self.read("docs/index.html")
+        self.assertEqual(html, "<title>Home</title><a href=\"/\">home</a><div><h1>Home</h1><p>Welcome</p></div>")
+        with gzip.open(f"{self.root}docs/index.html.gz", "rt") as f:
+            self.assertEqual(f.read(), html)
+        with gzip.open(f"{self.root}docs/index.css.gz", "rt") as f:
+            self.assertEqual(f.read(), "body {}")
+
+        threshold = generate_site.STREAM_THRESHOLD
+        generate_site.STREAM_THRESHOLD = 0
+        try:
+            build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/", f"{self.root}cache/manifest.json", True, gzip_level=6)
+        finally:
+            generate_site.STREAM_THRESHOLD = threshold
+        with gzip.open(f"{self.root}docs/blog/index.html.gz", "rt") as f:
+            self.assertEqual(f.read(), self.read("docs/blog/index.html"))
+
+        self.build()
+        self.assertFalse(path.exists(f"{self.root}docs/index.html.gz"))
+        self.assertFalse(path.exists(f"{self.root}docs/index.css.gz"))
+
+    def test_dependency_graph_invalidation(self):
+        makedirs(f"{self.root}partials/")
+        makedirs(f"{self.root}content/blog/first/")
+        makedirs(f"{self.root}content/blog/second/")
+        self.write("partials/nav.md", "[Home](/)")
+        self.write("content/blog/index.md", "# Blog\n\n{{ include nav.md }}\n\n{{ pages blog/ }}")
+        self.write("content/blog/first/index.md", "# First\n\n![tom](/index.css)")
+        self.write("content/blog/second/index.md", "# Second\n\n[blog](/blog/)")
+        self.build(partials=True)
+        self.assertIn("<ul><li><a href=\"/blog/first/\">First</a></li><li><a href=\"/blog/second/\">Second</a></li></ul>", self.read("docs/blog/index.html"))
+        graph = json.loads(self.read("cache/deps.json"))
+        self.assertEqual(graph[f"{self.root}content/blog/first/index.md"]["assets"], ["index.css"])
+        self.assertEqual(graph[f"{self.root}content/blog/second/index.md"]["links"], [f"{self.root}content/blog/index.md"])
+        self.assertEqual(self.build(partials=True), [])
+
+        self.write("partials/nav.md", "[Start](/)")
+        self.assertEqual(self.build(partials=True), [f"{self.root}content/blog/index.md"])
+        self.assertIn("<a href=\"/\">Start</a>", self.read("docs/blog/index.html"))
+
+        self.write("content/blog/second/index.md", "# Second post\n\n[blog](/blog/)")
+        self.assertEqual(self.build(partials=True), [f"{self.root}content/blog/second/index.md", f"{self.root}content/blog/index.md"])
+        self.assertIn(">Second post</a>", self.read("docs/blog/index.html"))
+
+        self.write("content/blog/second/index.md", "# Second post\n\nEdited body")
+        self.assertEqual(self.build(partials=True), [f"{self.root}content/blog/second/index.md"])
+
+        remove(f"{self.root}content/blog/first/index.md")
+        self.assertEqual(self.build(partials=True), [f"{self.root}content/blog/index.md"])
+        self.assertNotIn("First", self.read("docs/blog/index.html"))
+
+    def test_listing_without_page_index(self):
+        self.write("content/blog/post.md", "# Post\n\nText")
+        self.write("content/blog/index.md", "# Blog\n\n{{ pages blog/ }}")
+        self.build()
+        remove(f"{self.root}cache/pages.json")
+        self.write("content/blog/index.md", "# Blog\n\nAll posts:\n\n{{ pages blog/ }}")
+        self.assertEqual(self.build(), [f"{self.root}content/blog/index.md"])
+        self.assertIn("<p>All posts:</p><ul><li><a href=\"/blog/post.html\">Post</a></li></ul>", self.read("docs/blog/index.html"))
+
+    def test_listing_escapes_titles(self):
+        self.write("content/blog/a.md", "---\ntitle: Use `x` and *[y]* with_under **bold**\n---\n# A\n\nText")
+        self.write("content/blog/index.md", "# Blog\n\n{{ pages blog/ }}")
+        self.build()
+        self.assertIn("<li><a href=\"/blog/a.html\">Use &#96;x&#96; and &#42;&#91;y&#93;&#42; with&#95;under &#42;&#42;bold&#42;&#42;</a></li>", self.read("docs/blog/index.html"))
+
+    def test_broken_links(self):
+        self.write("content/index.md", "# Home\n\n[about](/about) ![logo](/logo.png) [external](https://example.com)")
+        self.write("content/about.md", "# About\n\n[home](/)")
+        with redirect_stdout(io.StringIO()) as output:
+            self.build()
+        self.assertEqual(output.getvalue().splitlines(), [f"{self.root}content/index.md: broken link to /logo.png", "Found 1 broken links in 1 pages"])
+        self.write("content/index.md", "# Home\n\n[about](/about) ![logo](/missing.png) [nowhere](/nowhere#top)")
+        remove(f"{self.root}content/about.md")
+        with redirect_stdout(io.StringIO()) as output, self.assertRaises(Exception):
+            self.build(strict_links=True)
+        self.assertEqual(output.getvalue().splitlines(), [f"{self.root}content/index.md: broken link to {url}" for url in ["/about", "/missing.png", "/nowhere#top"]] + ["Found 3 broken links in 1 pages"])
+        graph = json.loads(self.read("cache/deps.json"))
+        self.assertEqual(graph[f"{self.root}content/index.md"]["broken"], ["/about", "/missing.png", "/nowhere#top"])
+        self.write("content/about.md", "# About\n\n[home](/)")
+        self.write("content/index.md", "# Home\n\n[about](/about) ![logo](/missing.png)")
+        self.write("static/missing.png", "")
+        with redirect_stdout(io.StringIO()) as output:
+            self.build(strict_links=True)
+        self.assertEqual(output.getvalue(), "")
+
+    def test_fingerprinted_assets(self):
+        self.write("template.html", "<link href=\"/index.css\">{{ Content }}")
+        self.write("static/logo.png", "logo")
+        self.write("content/blog/index.md", "# Blog\n\n![logo](/logo.png)")
+        self.build(fingerprint=True, block_cache=BlockCache())
+        assets = json.loads(self.read("docs/assets.json"))
+        self.assertRegex(assets["index.css"], r"^index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(self.read(f"docs/{assets['index.css']}"), "body {}")
+        self.assertIn(f"<link href=\"/{assets['index.css']}\">", self.read("docs/index.html"))
+        self.assertIn(f"src=\"/{assets['logo.png']}\"", self.read("docs/blog/index.html"))
+        self.assertEqual(self.build(fingerprint=True), [])
+
+        self.write("static/logo.png", "new logo")
+        self.assertEqual(self.build(fingerprint=True, block_cache=BlockCache()), [f"{self.root}content/blog/index.md"])
+        logo = json.loads(self.read("docs/assets.json"))["logo.png"]
+        self.assertNotEqual(logo, assets["logo.png"])
+        self.assertFalse(path.exists(f"{self.root}docs/{assets['logo.png']}"))
+        self.assertIn(f"src=\"/{logo}\"", self.read("docs/blog/index.html"))
+
+        self.write("static/index.css", "body { color: red }")
+        self.assertEqual(len(self.build(fingerprint=True)), 2)
+
+        self.build()
+        self.assertFalse(path.exists(f"{self.root}docs/assets.json"))
+        self.assertIn("src=\"/logo.png\"", self.read("docs/blog/index.html"))
+
+    def test_search_terms_of_unrendered_pages(self):
+        makedirs(f"{self.root}partials/")
+        self.write("partials/nav.md", "Navigation words")
+        self.write("content/index.md", "# Home\n\n{{ include nav.md }}\n\nWelcome")
+        self.build(partials=True, search_index=True)
+        rendered = json.loads(self.read("cache/search_terms.json"))
+        self.assertIn("navigation", rendered[f"{self.root}content/index.md"]["terms"])
+        threshold = generate_site.STREAM_THRESHOLD
+        for stream_threshold in (threshold, 0):
+            remove(f"{self.root}cache/search_terms.json")
+            generate_site.STREAM_THRESHOLD = stream_threshold
+            try:
+                self.assertEqual(self.build(partials=True, search_index=True), [])
+            finally:
+                generate_site.STREAM_THRESHOLD = threshold
+            self.assertEqual(json.loads(self.read("cache/search_terms.json")), rendered)
+
+    def test_site_files_removed_when_turned_off(self):
+        self.build(site_url="https://example.com")
+        self.assertTrue(path.exists(f"{self.root}docs/sitemap.xml"))
+        self.write("docs/search.json", "[]")
+        self.build()
+        for name in ["sitemap.xml", "feed.xml"]:
+            self.assertFalse(path.exists(f"{self.root}docs/{name}"))
+        self.assertEqual(self.read("docs/search.json"), "[]")
+
+    def test_shards_merge_into_full_site(self):
+        for i in range(10):
+            self.write(f"content/blog/post{i}.md", f"# Post {i}\n\n[home](/)")
+        self.write("content/blog/index.md", "# Blog\n\n{{ pages blog/ }}")
+        self.build(site_url="https://example.com")
+        rendered = [self.build(shard=(number, 3), dest=f"shard{number}/", site_url="https://example.com") for number in range(1, 4)]
+        self.assertEqual(sorted(sum(rendered, [])), sorted(f"{self.root}content/{name}" for name in ["index.md", "blog/index.md"] + [f"blog/post{i}.md" for i in range(10)]))
+        self.assertFalse(path.exists(f"{self.root}shard1/sitemap.xml"))
+        self.assertEqual(json.loads(self.read("shard2/shard.json"))["shard"], [2, 3])
+
+        with self.assertRaises(Exception):
+            merge_shards([f"{self.root}shard1/", f"{self.root}shard2/"], f"{self.root}merged/")
+        makedirs(f"{self.root}merged/")
+        self.write("merged/CNAME", "example.com")
+        pages = merge_shards([f"{self.root}shard{number}/" for number in range(1, 4)], f"{self.root}merged/")
+        self.assertEqual(len(pages), 12)
+        for name in ["index.html", "index.css", "sitemap.xml", "feed.xml", "blog/index.html", "blog/post7.html"]:
+            self.assertEqual(self.read(f"merged/{name}"), self.read(f"docs/{name}"))
+        self.assertFalse(path.exists(f"{self.root}merged/shard.json"))
+
+        remove(f"{self.root}content/blog/post7.md")
+        for number in range(1, 4):
+            self.build(shard=(number, 3), dest=f"shard{number}/")
+        self.assertEqual(len(merge_shards([f"{self.root}shard{number}/" for number in range(1, 4)], f"{self.root}merged/")), 11)
+        for name in ["blog/post7.html", "sitemap.xml", "feed.xml"]:
+            self.assertFalse(path.exists(f"{self.root}merged/{name}"))
+        self.assertEqual(self.read("merged/CNAME"), "example.com")
+
+    def test_shard_rebuild_reuses_other_shards_titles(self):
+        for i in range(6):
+            self.write(f"content/blog/post{i}.md", f"# Post {i}\n\nText")
+        self.build(shard=(1, 2), dest="shard1/")
+        index = load_page_index(f"{self.root}cache/shard1/pages.json")
+        self.assertEqual(len(index), 8)
+        read = []
+        read_page_values = generate_site.read_page_values
+        generate_site.read_page_values = lambda from_path: read.append(from_path) or read_page_values(from_path)
+        try:
+            self.assertEqual(self.build(shard=(1, 2), dest="shard1/"), [])
+        finally:
+            generate_site.read_page_values = read_page_values
+        self.assertEqual(read, [])
+
+    def test_blocking_io_matches_prefetch(self):
+        self.build()
+        prefetched = [self.read("docs/index.html"), self.read("docs/blog/index.html")]
+        build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/", f"{self.root}cache/manifest.json", True, io_threads=0)
+        self.assertEqual([self.read("docs/index.html"), self.read("docs/blog/index.html")], prefetched)
+
+    def test_parallel_build_matches_serial(self):
+        self.build()
+        serial = [self.read("docs/index.html"), self.read("docs/blog/index.html")]
+        rendered = self.build(full_rebuild=True, jobs=2)
+        self.assertEqual(sorted(rendered), [f"{self.root}content/blog/index.md", f"{self.root}content/index.md"])
+        self.assertEqual([self.read("docs/index.html"), self.read("docs/blog/index.html")], serial)
+
+    def test_parallel_error_names_source(self):
+        self.write("content/blog/index.md", "no title here")
+        with self.assertRaisesRegex(Exception, "content/blog/index.md"):
+            self.build(jobs=2)
+
+if __name__ == "__main__":
+    unittest.main()
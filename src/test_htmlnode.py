@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 from htmlnode import *
 
@@ -73,5 +74,32 @@ class TestHMTMLNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_write_html_matches_to_html(self):
+        link = LeafNode("a", "link", {"href": "/blog", "target": "_blank"})
+        parent_node = ParentNode("div", [LeafNode(None, "text "), ParentNode("p", [LeafNode("b", "bold"), link])])
+        fp = StringIO()
+        parent_node.write_html(fp)
+        self.assertEqual(fp.getvalue(), parent_node.to_html())
+
+    def test_write_html_missing_value(self):
+        parent_node = ParentNode("div", [LeafNode("b", None)])
+        with self.assertRaises(ValueError):
+            parent_node.write_html(StringIO())
+
+    def test_verbatim_node(self):
+        node = VerbatimNode("pre", "x < y && y > z", {"class": "code"}, "code")
+        self.assertEqual(node.to_html(), "<pre class=\"code\"><code>x &lt; y &amp;&amp; y &gt; z</code></pre>")
+        self.assertEqual(VerbatimNode("code", "<b>").to_html(), "<code>&lt;b&gt;</code>")
+
+    def test_verbatim_write_html_in_chunks(self):
+        node = VerbatimNode("pre", "a<b&" * (VERBATIM_CHUNK // 3), inner_tag="code")
+        fp = StringIO()
+        ParentNode("div", [node]).write_html(fp)
+        self.assertEqual(fp.getvalue(), f"<div>{node.to_html()}</div>")
+
+    def test_verbatim_tuple_round_trip(self):
+        node = ParentNode("div", [VerbatimNode("pre", "<tag>", inner_tag="code"), LeafNode("p", "text")])
+        self.assertEqual(node_from_tuple(node.to_tuple()).to_html(), node.to_html())
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import unittest
+import tempfile
+from os import path
+
+from pageio import *
+
+
+class TestPageIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = f"{self.tmp.name}/"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_make_dirs(self):
+        make_dirs([f"{self.root}docs/blog/a/index.html", f"{self.root}docs/blog/index.html", f"{self.root}docs/index.html"])
+        self.assertTrue(path.isdir(f"{self.root}docs/blog/a"))
+
+    def test_prefetch_keeps_order(self):
+        paths = []
+        for i in range(20):
+            paths.append(f"{self.root}{i}.md")
+            write_output(paths[-1], f"page {i}")
+        with PageIO(threads=2) as io:
+            sources = [source.result() for source in io.prefetch(paths)]
+        self.assertEqual(sources, [f"page {i}" for i in range(20)])
+
+    def test_prefetch_skips_large_files(self):
+        write_output(f"{self.root}large.md", "x" * 100)
+        with PageIO() as io:
+            self.assertIsNone(next(io.prefetch([f"{self.root}large.md"], 10)).result())
+
+    def test_write_behind(self):
+        with PageIO(threads=2, window=1) as io:
+            for i in range(10):
+                io.write(f"{self.root}{i}.html", f"page {i}")
+        for i in range(10):
+            self.assertEqual(read_source(f"{self.root}{i}.html"), f"page {i}")
+
+    def test_write_errors_raise_on_close(self):
+        io = PageIO()
+        io.write(f"{self.root}missing/index.html", "page")
+        with self.assertRaises(Exception) as e:
+            io.close()
+        self.assertIn("Failed to write", str(e.exception))
+
+if __name__ == "__main__":
+    unittest.main()
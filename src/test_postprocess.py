@@ -0,0 +1,31 @@
+import unittest
+import gzip
+from io import StringIO
+
+from postprocess import *
+
+
+class TestPostprocess(unittest.TestCase):
+    def test_minify_collapses_whitespace(self):
+        html = "<html>\n  <head>\n    <title> Title </title>\n  </head>\n  <body>\n    <p>Some   <b>bold</b>\n text</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<html><head><title>Title</title></head><body><p>Some <b>bold</b> text</p></body></html>")
+
+    def test_minify_keeps_preformatted(self):
+        html = "<div>\n  <pre><code>def f():\n    return 1\n</code></pre>\n  <p>a  b</p>\n  <script>\nlet  x = 1;\n</script>\n</div>"
+        self.assertEqual(minify_html(html), "<div><pre><code>def f():\n    return 1\n</code></pre><p>a b</p><script>\nlet  x = 1;\n</script></div>")
+
+    def test_minify_keeps_raw_angle_brackets(self):
+        self.assertEqual(minify_html("<p><a href=\"/\">< Back   Home</a></p>"), "<p><a href=\"/\">< Back Home</a></p>")
+
+    def test_gzip_is_deterministic(self):
+        first = gzip_bytes(b"<p>page</p>", 6)
+        self.assertEqual(first, gzip_bytes(b"<p>page</p>", 6))
+        self.assertEqual(gzip.decompress(first), b"<p>page</p>")
+
+    def test_tee_writer(self):
+        first, second = StringIO(), StringIO()
+        TeeWriter(first, second).write("<p>")
+        self.assertEqual((first.getvalue(), second.getvalue()), ("<p>", "<p>"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from profiler import *
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_timer(self):
+        timer = StageTimer()
+        with timer.stage("read"):
+            pass
+        with timer.stage("read"):
+            pass
+        self.assertEqual(list(timer.stages), ["read"])
+        self.assertGreaterEqual(timer.stages["read"], 0)
+
+    def test_disabled_stage_timer(self):
+        timer = StageTimer(False)
+        with timer.stage("read"):
+            pass
+        self.assertEqual(timer.stages, {})
+
+    def test_totals_and_slowest(self):
+        profiler = Profiler()
+        profiler.add_page("a.md", {"read": 1.0, "write": 2.0})
+        profiler.add_page("b.md", {"read": 4.0})
+        profiler.add_static("a.png", 0.5)
+        totals = profiler.stage_totals()
+        self.assertEqual(totals["read"], 5.0)
+        self.assertEqual(totals["write"], 2.0)
+        self.assertEqual(totals["static copy"], 0.5)
+        self.assertEqual([page for page, _ in profiler.slowest_pages(1)], ["b.md"])
+        self.assertIn("b.md", profiler.report())
+
+if __name__ == "__main__":
+    unittest.main()
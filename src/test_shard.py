@@ -0,0 +1,30 @@
+import unittest
+
+from shard import *
+
+
+class TestShard(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ["0/4", "5/4", "1", "a/b", "-1/4"]:
+            with self.assertRaises(Exception):
+                parse_shard(text)
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of("blog/tom/index.md", 4))
+        self.assertEqual(shard_of("blog/tom/index.md", 1), 1)
+        self.assertEqual({shard_of(f"page{i}.md", 4) for i in range(100)}, {1, 2, 3, 4})
+
+    def test_shard_pages_partition(self):
+        index = {f"./content/page{i}.md": {} for i in range(50)}
+        shards = [shard_pages(index, "./content/", (number, 3)) for number in range(1, 4)]
+        self.assertEqual(sum(len(pages) for pages in shards), 50)
+        self.assertEqual(set().union(*shards), set(index))
+        moved = {f"/srv/site/content/page{i}.md": {} for i in range(50)}
+        self.assertEqual(
+            sorted(from_path[len("./content/"):] for from_path in shard_pages(index, "./content/", (2, 3))),
+            sorted(from_path[len("/srv/site/content/"):] for from_path in shard_pages(moved, "/srv/site/content/", (2, 3))),
+        )
+
+if __name__ == "__main__":
+    unittest.main()
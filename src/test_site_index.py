@@ -0,0 +1,45 @@
+import unittest
+import json
+import tempfile
+
+from site_index import *
+from htmlnode import LeafNode, ParentNode
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("./docs/index.html", "./docs/", "/"), "/")
+        self.assertEqual(page_url("./docs/blog/tom/index.html", "./docs/", "/site/"), "/site/blog/tom/")
+        self.assertEqual(page_url("./docs/about.html", "./docs/", "/"), "/about.html")
+
+    def test_node_terms(self):
+        node = ParentNode("div", [
+            LeafNode("b", "Bold_Words"),
+            LeafNode(None, "<p>Cached <a href=\"/skip\">Link</a></p>"),
+            LeafNode(None, "< Back Home"),
+            LeafNode("img", "", {"src": "/a.png", "alt": "ignored"}),
+        ])
+        self.assertEqual(node_terms(node), {"bold", "words", "cached", "link", "back", "home"})
+
+    def test_feed_pages(self):
+        pages = [
+            {"url": "/blog/", "title": "Blog", "meta": {}, "mtime": 0},
+            {"url": "/blog/old/", "title": "Old", "meta": {"date": "2024-01-01"}, "mtime": 0},
+            {"url": "/blog/new/", "title": "New", "meta": {"date": "2025-06-01T10:00:00+02:00"}, "mtime": 0},
+            {"url": "/contact/", "title": "Contact", "meta": {}, "mtime": 0},
+        ]
+        self.assertEqual([page["title"] for page in feed_pages(pages, "/")], ["New", "Old"])
+
+    def test_search_index(self):
+        pages = [
+            {"url": "/b/", "title": "B", "terms": ["ring", "tom"]},
+            {"url": "/a/", "title": "A", "terms": ["ring"]},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            write_search_index(f"{tmp}/search.json", pages)
+            with open(f"{tmp}/search.json") as f:
+                index = json.load(f)
+        self.assertEqual(index, {"pages": [["/a/", "A"], ["/b/", "B"]], "terms": {"ring": [0, 1], "tom": [1]}})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from io import StringIO
+
+from template import *
+from htmlnode import LeafNode, ParentNode
+from fingerprint import AssetManifest
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = Template("<title>{{ Title }}</title><main>{{Content}}</main>")
+        self.assertEqual(template.literals, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual(template.slots, ["title", "content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}<p>{{ Author }}</p>")
+        content = ParentNode("div", [LeafNode("b", "bold")])
+        self.assertEqual(
+            template.render({"title": "Home", "content": content, "author": "Tolkien"}),
+            "<title>Home</title><div><b>bold</b></div><p>Tolkien</p>",
+        )
+
+    def test_write_matches_render(self):
+        template = Template("{{ Title }}|{{ Content }}|{{ Missing }}|")
+        values = {"title": "Home", "content": ParentNode("p", [LeafNode(None, "text")])}
+        fp = StringIO()
+        template.write(fp, values)
+        self.assertEqual(fp.getvalue(), template.render(values))
+        self.assertEqual(fp.getvalue(), "Home|<p>text</p>||")
+
+    def test_rebase(self):
+        template = Template("<link href=\"/index.css\"><img src=\"/logo.png\">{{ Content }}<a href=\"https://boot.dev\">")
+        template.rebase("/site/")
+        self.assertEqual(
+            template.render({"content": "<a href=\"/keep\">"}),
+            "<link href=\"/site/index.css\"><img src=\"/site/logo.png\"><a href=\"/keep\"><a href=\"https://boot.dev\">",
+        )
+
+    def test_rebase_fingerprinted_assets(self):
+        template = Template("<link href=\"/index.css?v=1\"><img src=\"/logo.png\"><a href=\"/\">{{ Content }}")
+        template.rebase("/site/", AssetManifest({"index.css": "index.0123abcd.css"}))
+        self.assertEqual(template.render({"content": ""}), "<link href=\"/site/index.0123abcd.css?v=1\"><img src=\"/site/logo.png\"><a href=\"/site/\">")
+        self.assertEqual(template.assets, {"index.css"})
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({}), "<p>static</p>")
+
+if __name__ == "__main__":
+    unittest.main()
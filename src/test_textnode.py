@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 from textnode import *
 
@@ -59,6 +60,13 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.props_to_html(), " src=\"https://www.boot.dev\" alt=\"This is an image node\"")
         self.assertEqual(html_node.to_html(), "<img src=\"https://www.boot.dev\" alt=\"This is an image node\"></img>")
     
+    def test_link_rebased(self):
+        node = TextNode("This is a link node", TextType.LINK, "/blog/tom")
+        html_node = text_to_html(node, lambda url: rebase_url(url, "/site/"))
+        self.assertEqual(html_node.to_html(), "<a href=\"/site/blog/tom\">This is a link node</a>")
+        external = TextNode("This is a link node", TextType.LINK, "https://www.boot.dev")
+        self.assertEqual(text_to_html(external, lambda url: rebase_url(url, "/site/")).props["href"], "https://www.boot.dev")
+
     def test_delim_bold(self):
         node = TextNode("This is text with a **bolded** word", TextType.NORMAL)
         new_nodes = split_nodes_delimiter([node], "**", TextType.BOLD)
@@ -212,7 +220,25 @@ class TestTextNode(unittest.TestCase):
             ],
             nodes,
         )
-    
+
+    def test_text_conversion_keeps_text_after_leading_link(self):
+        nodes = text_to_textnodes("[link](https://boot.dev) and ![image](/a.png) then **more**")
+
+        self.assertListEqual(
+            [
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+                TextNode(" and ", TextType.NORMAL),
+                TextNode("image", TextType.IMAGE, "/a.png"),
+                TextNode(" then ", TextType.NORMAL),
+                TextNode("more", TextType.BOLD),
+            ],
+            nodes,
+        )
+
+    def test_text_conversion_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -256,6 +282,32 @@ This is the same paragraph on a new line
             ],
         )
     
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        md = """
+This is **bolded** paragraph
+
+
+
+This is another paragraph with _italic_ text and `code` here
+This is the same paragraph on a new line
+  
+- This is a list
+- with items
+
+   
+"""
+        self.assertEqual(list(iter_blocks(StringIO(md))), markdown_to_blocks(md))
+        self.assertEqual(list(iter_blocks(md.split("\n"))), markdown_to_blocks(md))
+        data = md.encode()
+        spans = [data[start:end].decode().strip() for start, end in iter_block_spans(data)]
+        self.assertEqual([block for block in spans if block], markdown_to_blocks(md))
+
+    def test_markdown_stream(self):
+        md = "# heading\n\n- [link](/a)\n- item\n\nparagraph"
+        fp = StringIO()
+        MarkdownStream(iter_blocks(StringIO(md))).write_html(fp)
+        self.assertEqual(fp.getvalue(), markdown_to_html_node(md).to_html())
+
     def test_block_to_block_types(self):
         block = "# heading"
         self.assertEqual(block_to_block_type(block), BlockType.HEAD)
@@ -282,6 +334,20 @@ This is the same paragraph on a new line
         block = "tests# tests"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
     
+    def test_block_to_block_types_edge_cases(self):
+        block = "\n".join(f"{i}. item" for i in range(1, 12))
+        self.assertEqual(block_to_block_type(block), BlockType.ORDERED)
+        block = "1. first item\n3. third item"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+        block = "- first item\n-"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+        block = "```\ncode"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+        block = "> line\nnot quoted"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+        block = "# \nheading"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -380,5 +446,50 @@ the **same** even with inline stuff
             "<div><pre><code>\nThis is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_links_take_precedence_over_delimiters(self):
+        self.assertEqual(text_to_textnodes("[a_b](/c_d)"), [TextNode("a_b", TextType.LINK, "/c_d")])
+        self.assertEqual(text_to_textnodes("![a_b](/i_1.png)"), [TextNode("a_b", TextType.IMAGE, "/i_1.png")])
+        self.assertEqual(
+            text_to_textnodes("see [a **b** c](/x) now"),
+            [TextNode("see ", TextType.NORMAL), TextNode("a **b** c", TextType.LINK, "/x"), TextNode(" now", TextType.NORMAL)],
+        )
+
+    def test_code_spans_protect_delimiters(self):
+        self.assertEqual(
+            text_to_textnodes("`a_b` and _c_"),
+            [TextNode("a_b", TextType.CODE), TextNode(" and ", TextType.NORMAL), TextNode("c", TextType.ITALIC)],
+        )
+
+    def test_unclosed_delimiter_after_link(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("[](b c**)**")
+
+    def test_url_rewriter_records_distinct_urls(self):
+        rewrite_url = UrlRewriter("/site/")
+        node = markdown_to_html_node("[a](/a) [b](/a)\n\n![c](/c.png) [a](/a)", rewrite_url)
+        self.assertIn("href=\"/site/a\"", node.to_html())
+        self.assertEqual(rewrite_url.urls, {"/a", "/c.png"})
+
+    def test_rebase_skips_code(self):
+        md = """
+![image](/images/a.png) and [link](/contact)
+
+```
+<a href="/contact">raw</a>
+```
+"""
+
+        node = markdown_to_html_node(md, lambda url: rebase_url(url, "/site/"))
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><p><img src=\"/site/images/a.png\" alt=\"image\"></img> and <a href=\"/site/contact\">link</a></p><pre><code>\n&lt;a href=\"/contact\"&gt;raw&lt;/a&gt;\n</code></pre></div>",
+        )
+
+    def test_code_block_is_escaped(self):
+        node = block_to_html("```\nif a < b && b > c:\n    pass\n```", block_type=BlockType.CODE)
+        self.assertIsInstance(node, VerbatimNode)
+        self.assertEqual(node.to_html(), "<pre><code>\nif a &lt; b &amp;&amp; b &gt; c:\n    pass\n</code></pre>")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
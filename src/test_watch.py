@@ -0,0 +1,81 @@
+import unittest
+import tempfile
+from os import path, makedirs, remove
+
+from watch import *
+from console import set_verbosity, NORMAL
+
+
+class TestWatch(unittest.TestCase):
+    def test_diff_snapshots(self):
+        old = {"a.md": (1, 10), "b.md": (1, 10), "c.md": (1, 10)}
+        new = {"a.md": (1, 10), "b.md": (2, 11), "d.md": (1, 5)}
+        changed, removed = diff_snapshots(old, new)
+        self.assertEqual(changed, ["b.md", "d.md"])
+        self.assertEqual(removed, ["c.md"])
+
+    def test_static_inner_path(self):
+        self.assertEqual(static_inner_path("./static/images/tom.png", "./static/"), "images/tom.png")
+
+class TestPollOnce(unittest.TestCase):
+    def setUp(self):
+        set_verbosity(QUIET)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = f"{self.tmp.name}/"
+        for directory in ["static/", "content/blog/", "partials/", "docs/"]:
+            makedirs(f"{self.root}{directory}")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("partials/nav.md", "[Home](/)")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/index.md", "# Blog\n\n{{ include nav.md }}")
+        self.write("content/blog/post.md", "# Post\n\nText")
+        args = (f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/", f"{self.root}cache/manifest.json")
+        build_site(*args, partials_path=f"{self.root}partials/")
+        self.state = WatchState(*args, partials_path=f"{self.root}partials/")
+
+    def tearDown(self):
+        set_verbosity(NORMAL)
+        self.tmp.cleanup()
+
+    def write(self, name, contents):
+        with open(f"{self.root}{name}", "w") as f:
+            f.write(contents)
+
+    def read(self, name):
+        with open(f"{self.root}{name}") as f:
+            return f.read()
+
+    def test_nothing_changed(self):
+        self.assertEqual(poll_once(self.state), [])
+
+    def test_page_edit_renders_only_that_page(self):
+        self.write("content/blog/post.md", "# Post\n\nEdited text")
+        self.assertEqual(poll_once(self.state), [f"{self.root}content/blog/post.md"])
+        self.assertIn("<p>Edited text</p>", self.read("docs/blog/post.html"))
+        self.assertEqual(poll_once(self.state), [])
+
+    def test_removed_source_deletes_output(self):
+        remove(f"{self.root}content/blog/post.md")
+        self.assertEqual(poll_once(self.state), [])
+        self.assertFalse(path.exists(f"{self.root}docs/blog/post.html"))
+        self.assertNotIn(f"{self.root}content/blog/post.md", self.state.manifest["pages"])
+
+    def test_partial_edit_renders_dependents(self):
+        self.write("partials/nav.md", "[Start page](/)")
+        self.assertEqual(poll_once(self.state), [f"{self.root}content/blog/index.md"])
+        self.assertIn(">Start page</a>", self.read("docs/blog/index.html"))
+
+    def test_template_change_renders_every_page(self):
+        self.write("template.html", "<h6>{{ Title }}</h6>{{ Content }}")
+        self.assertEqual(sorted(poll_once(self.state)), sorted(f"{self.root}content/{name}" for name in ["index.md", "blog/index.md", "blog/post.md"]))
+        self.assertTrue(self.read("docs/index.html").startswith("<h6>Home</h6>"))
+
+    def test_save_keeps_incremental_state(self):
+        self.write("content/blog/post.md", "# Renamed\n\nText")
+        poll_once(self.state)
+        self.state.save()
+        self.assertEqual(build_site(f"{self.root}static/", f"{self.root}content/", f"{self.root}template.html", f"{self.root}docs/", "/", f"{self.root}cache/manifest.json", partials_path=f"{self.root}partials/"), [])
+
+if __name__ == "__main__":
+    unittest.main()
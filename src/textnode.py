@@ -1,6 +1,6 @@
 import re
 from enum import Enum
-from htmlnode import LeafNode, ParentNode
+from htmlnode import LeafNode, ParentNode, VerbatimNode
 
 class TextType(Enum):
     NORMAL  = 'normal'
@@ -19,6 +19,8 @@ class BlockType(Enum):
     ORDERED = 'ordered_list'
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type: TextType, url=None):
         self.text = text
         self.text_type = text_type
@@ -32,22 +34,39 @@ class TextNode:
             return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
         return f"TextNode({self.text}, {self.text_type.value})"
 
-def text_to_html(text_node: TextNode):
-        match text_node.text_type:
-            case TextType.NORMAL:
-                return LeafNode(None, text_node.text)
-            case TextType.BOLD:
-                return LeafNode("b", text_node.text)
-            case TextType.ITALIC:
-                return LeafNode("i", text_node.text)
-            case TextType.CODE:
-                return LeafNode("code", text_node.text)
-            case TextType.LINK:
-                return LeafNode("a", text_node.text, {"href": text_node.url})
-            case TextType.IMAGE:
-                return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-            case _:
-                raise Exception(f"invalid text type: {text_node.text_type}")
+def rebase_url(url, basepath):
+    if basepath and url.startswith("/"):
+        return f"{basepath}{url[1:]}"
+    return url
+
+class UrlRewriter:
+    def __init__(self, basepath, assets=None):
+        self.basepath = basepath
+        self.assets = assets
+        self.urls = set()
+        self.block_urls = None
+
+    def __call__(self, url):
+        self.urls.add(url)
+        if self.block_urls is not None:
+            self.block_urls.add(url)
+        if self.assets is not None:
+            url = self.assets.url(url)
+        return rebase_url(url, self.basepath)
+
+TEXT_TAGS = {TextType.NORMAL: None, TextType.BOLD: "b", TextType.ITALIC: "i", TextType.CODE: "code"}
+
+def text_to_html(text_node: TextNode, rewrite_url=None):
+        text_type = text_node.text_type
+        if text_type in TEXT_TAGS:
+            return LeafNode(TEXT_TAGS[text_type], text_node.text)
+        if text_type is TextType.LINK:
+            url = rewrite_url(text_node.url) if rewrite_url else text_node.url
+            return LeafNode("a", text_node.text, {"href": url})
+        if text_type is TextType.IMAGE:
+            url = rewrite_url(text_node.url) if rewrite_url else text_node.url
+            return LeafNode("img", "", {"src": url, "alt": text_node.text})
+        raise Exception(f"invalid text type: {text_node.text_type}")
             
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -133,87 +152,146 @@ def split_nodes_link(old_nodes):
         new_nodes.append(node)
     return new_nodes
 
+INLINE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)|(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)|\*\*|_|`")
+INLINE_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
 def text_to_textnodes(text):
-    return split_nodes_link(
-        split_nodes_image(
-            split_nodes_delimiter(
-                split_nodes_delimiter(
-                    split_nodes_delimiter(
-                        [TextNode(text, TextType.NORMAL)], '**', TextType.BOLD)
-                , '_', TextType.ITALIC)
-            , '`', TextType.CODE)
-        )
-    )
+    nodes = []
+    position = 0
+    while True:
+        match = INLINE_PATTERN.search(text, position)
+        if match is None:
+            break
+        start, end = match.span()
+        if start > position:
+            nodes.append(TextNode(text[position:start], TextType.NORMAL))
+        if match.lastindex == 2:
+            nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        elif match.lastindex == 4:
+            nodes.append(TextNode(match.group(3), TextType.LINK, match.group(4)))
+        else:
+            delimiter = match.group()
+            closing = text.find(delimiter, end)
+            if closing == -1:
+                raise ValueError("invalid markdown file format")
+            if closing > end:
+                nodes.append(TextNode(text[end:closing], INLINE_DELIMITERS[delimiter]))
+            end = closing + len(delimiter)
+        position = end
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.NORMAL))
+    return nodes
 
 def markdown_to_blocks(markdown):
-    md_blocks = markdown.split("\n\n")
-    md_no_whitespace = list(map(lambda block: block.strip(), md_blocks))
-    md_clean = list(filter(lambda block: block != '', md_no_whitespace))
-    return md_clean
+    return [block for block in map(str.strip, markdown.split("\n\n")) if block]
+
+def iter_blocks(lines):
+    block_lines = []
+    for line in lines:
+        if line == "\n" or line == "":
+            block = "\n".join(block_lines).strip()
+            if block:
+                yield block
+            block_lines = []
+        else:
+            block_lines.append(line[:-1] if line.endswith("\n") else line)
+    block = "\n".join(block_lines).strip()
+    if block:
+        yield block
+
+def iter_block_spans(buffer, start=0):
+    end = len(buffer)
+    while start < end:
+        boundary = buffer.find(b"\n\n", start)
+        if boundary == -1:
+            boundary = end
+        yield start, boundary
+        start = boundary + 2
+
+HEADING_PATTERN = re.compile(r"#+ .")
+QUOTE_PATTERN = re.compile(r">[^\n]*(?:\n>[^\n]*)*")
+UNORDERED_PATTERN = re.compile(r"- [^\n]+(?:\n- [^\n]+)*")
+
+def is_heading(md_block):
+    return HEADING_PATTERN.match(md_block) is not None
+
+def is_code(md_block):
+    return md_block.startswith("```") and md_block.endswith("\n```")
+
+def is_quote(md_block):
+    return QUOTE_PATTERN.fullmatch(md_block) is not None
+
+def is_unordered_list(md_block):
+    return UNORDERED_PATTERN.fullmatch(md_block) is not None
+
+def is_ordered_list(md_block):
+    for i, line in enumerate(md_block.split("\n"), start=1):
+        number = str(i)
+        width = len(number)
+        if not line.startswith(number) or line[width + 1:width + 2] != " " or len(line) <= width + 2:
+            return False
+    return True
+
+BLOCK_CLASSIFIERS = {
+    "#": (is_heading, BlockType.HEAD),
+    "`": (is_code, BlockType.CODE),
+    ">": (is_quote, BlockType.QUOTE),
+    "-": (is_unordered_list, BlockType.UNORDERED),
+    "1": (is_ordered_list, BlockType.ORDERED),
+}
 
 def block_to_block_type(md_block):
-    lines = md_block.split("\n")
-    if re.match(r"(^#+ ).+", md_block): return BlockType.HEAD
-    if len(lines) > 1 and re.match(r"(^```)", lines[0]) and re.match(r"```$", lines[-1]): return BlockType.CODE
-    if re.match(r"(^>)", md_block):
-        for line in lines:
-            if not re.match(r"(^>)", line):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if re.match(r"(^- ).+", md_block):
-        for line in lines:
-            if not re.match(r"(^- ).+", line):
-                return BlockType.PARAGRAPH
-        return BlockType.UNORDERED
-    if re.match(r"(^1. ).+", md_block):
-        for i, line  in enumerate(lines, start=1):
-            if not re.match(rf"(^{i}. ).+", line):
-                return BlockType.PARAGRAPH
-        return BlockType.ORDERED
+    classifier = BLOCK_CLASSIFIERS.get(md_block[:1])
+    if classifier and classifier[0](md_block):
+        return classifier[1]
     return BlockType.PARAGRAPH
 
-def text_to_children(markdown):
+def text_to_children(markdown, rewrite_url=None):
     nodes = text_to_textnodes(markdown)
     children = []
 
     for node in nodes:
-        html_node = text_to_html(node)
+        html_node = text_to_html(node, rewrite_url)
         children.append(html_node)
     
     return children
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, rewrite_url=None):
     md_blocks = markdown_to_blocks(markdown)
     children = []
 
     for block in md_blocks:
-        html_node = block_to_html(block)
+        html_node = block_to_html(block, rewrite_url)
         children.append(html_node)
     return ParentNode("div", children)
 
-def block_to_html(block):
-    block_type = block_to_block_type(block)
-
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html(block)
-    if block_type == BlockType.HEAD:
-        return heading_to_html(block)
-    if block_type == BlockType.CODE:
-        return code_to_html(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html(block)
-    if block_type == BlockType.UNORDERED:
-        return ulist_to_html(block)
-    if block_type == BlockType.ORDERED:
-        return olist_to_html(block)
-
-def paragraph_to_html(block):
-    paragraph = " ".join(block.split("\n"))
-    children = text_to_children(paragraph)
+class MarkdownStream:
+    def __init__(self, blocks, rewrite_url=None, on_node=None):
+        self.blocks = blocks
+        self.rewrite_url = rewrite_url
+        self.on_node = on_node
+
+    def write_html(self, fp):
+        fp.write("<div>")
+        for block in self.blocks:
+            node = block_to_html(block, self.rewrite_url)
+            node.write_html(fp)
+            if self.on_node:
+                self.on_node(node)
+        fp.write("</div>")
+
+def block_to_html(block, rewrite_url=None, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
+    return BLOCK_RENDERERS[block_type](block, rewrite_url)
+
+def paragraph_to_html(block, rewrite_url=None):
+    paragraph = block.replace("\n", " ")
+    children = text_to_children(paragraph, rewrite_url)
 
     return ParentNode("p", children)
 
-def heading_to_html(block):
+def heading_to_html(block, rewrite_url=None):
     value = 0
 
     for char in block:
@@ -221,45 +299,49 @@ def heading_to_html(block):
         else: break
     
     content = block[value + 1:]
-    children = text_to_children(content)
+    children = text_to_children(content, rewrite_url)
 
     return ParentNode(f"h{value}", children)
 
-def code_to_html(block):
-    content = block[3:-3]
-    text_node = TextNode(content, TextType.NORMAL)
-    child = text_to_html(text_node)
-    code = ParentNode("code", [child])
+def code_to_html(block, rewrite_url=None):
+    return VerbatimNode("pre", block[3:-3], inner_tag="code")
 
-    return ParentNode("pre", [code])
-
-def quote_to_html(block):
+def quote_to_html(block, rewrite_url=None):
     lines = block.split("\n")
     new_lines = []
     for line in lines:
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, rewrite_url)
 
     return ParentNode("blockquote", children)
 
-def ulist_to_html(block):
+def ulist_to_html(block, rewrite_url=None):
     items = block[2:].split("\n- ")
     html_items = []
 
     for item in items:
-        children = text_to_children(item)
+        children = text_to_children(item, rewrite_url)
         html_items.append(ParentNode("li", children))
     
     return ParentNode("ul", html_items)
 
-def olist_to_html(block):
+def olist_to_html(block, rewrite_url=None):
     items = block.split("\n")
     html_items = []
 
     for item in items:
         new_text = item[3:]
-        children = text_to_children(new_text)
+        children = text_to_children(new_text, rewrite_url)
         html_items.append(ParentNode("li", children))
     
-    return ParentNode("ol", html_items)
\ No newline at end of file
+    return ParentNode("ol", html_items)
+
+BLOCK_RENDERERS = {
+    BlockType.PARAGRAPH: paragraph_to_html,
+    BlockType.HEAD: heading_to_html,
+    BlockType.CODE: code_to_html,
+    BlockType.QUOTE: quote_to_html,
+    BlockType.UNORDERED: ulist_to_html,
+    BlockType.ORDERED: olist_to_html,
+}
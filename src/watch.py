@@ -0,0 +1,170 @@
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from os import path, stat, makedirs
+from threading import Thread
+from generate_site import build_site, scan_files, scan_pages, page_index_path, load_page_index, save_page_index, render_page, hash_file, load_manifest, save_manifest, sync_static_file, remove_output, graph_path, site_pages, RenderSettings
+from template import load_template
+from console import log, QUIET, VERBOSE
+from cache import BlockCache
+from directives import Directives
+from deps import load_graph, save_graph, page_edges, dependents, outdated, broken_links, report_broken_links, PartialHashes
+from postprocess import COMPRESSIBLE, gzip_file
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def file_signature(file_path):
+    file_stat = stat(file_path)
+    return (file_stat.st_size, file_stat.st_mtime_ns)
+
+def snapshot(dir_path):
+    return {f"{dir_path}{inner_path}": (file_stat.st_size, file_stat.st_mtime_ns) for inner_path, file_stat in scan_files(dir_path)}
+
+def page_snapshot(pages):
+    return {from_path: (page["size"], page["mtime"]) for from_path, page in pages.items()}
+
+def diff_snapshots(old, new):
+    changed = [file_path for file_path, signature in new.items() if old.get(file_path) != signature]
+    removed = [file_path for file_path in old if file_path not in new]
+    return changed, removed
+
+def serve(dest_dir_path, port):
+    server = ThreadingHTTPServer(("", port), partial(QuietHandler, directory=dest_dir_path))
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def static_inner_path(file_path, static_src):
+    return path.relpath(file_path, static_src).replace(path.sep, "/")
+
+class WatchState:
+    def __init__(self, static_src, dir_path_content, template_path, dest_dir_path, basepath, manifest_path, minify=False, gzip_level=None, partials_path=None):
+        self.static_src = static_src
+        self.dir_path_content = dir_path_content
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.basepath = basepath
+        self.manifest_path = manifest_path
+        self.gzip_level = gzip_level
+        self.partials_path = partials_path
+        self.manifest = load_manifest(manifest_path)
+        self.pages = load_page_index(page_index_path(manifest_path))
+        self.graph = load_graph(graph_path(manifest_path))
+        template = load_template(template_path)
+        template.rebase(basepath)
+        self.directives = Directives(dir_path_content, partials_path, site_pages(self.pages, dest_dir_path))
+        self.settings = RenderSettings(template, basepath, block_cache=BlockCache(), minify=minify, gzip_level=gzip_level, directives=self.directives)
+        self.static_files = snapshot(static_src)
+        self.partial_files = self.partial_snapshot()
+        self.template_signature = file_signature(template_path)
+
+    def partial_snapshot(self):
+        return snapshot(self.partials_path) if self.partials_path and path.isdir(self.partials_path) else {}
+
+    def save(self):
+        save_manifest(self.manifest_path, self.manifest)
+        save_page_index(page_index_path(self.manifest_path), {from_path: page for from_path, page in self.pages.items() if "hash" in page and "title" in page})
+        save_graph(graph_path(self.manifest_path), self.graph)
+
+def poll_once(state):
+    started = time.perf_counter()
+    manifest = state.manifest
+    directives = state.directives
+    stale = []
+    dirty = False
+
+    new_pages = scan_pages(state.dir_path_content, state.dest_dir_path, state.pages)
+    changed, removed = diff_snapshots(page_snapshot(state.pages), page_snapshot(new_pages))
+    state.pages = pages = new_pages
+    if changed or removed:
+        dirty = True
+        stale = changed
+        directives.pages = site_pages(pages, state.dest_dir_path)
+        for file_path in removed:
+            state.graph.pop(file_path, None)
+            page = manifest["pages"].pop(file_path, None)
+            if page:
+                remove_output(page["dest"])
+                log(f"Removed {page['dest']}", VERBOSE)
+
+    new_partial_files = state.partial_snapshot()
+    changed, removed = diff_snapshots(state.partial_files, new_partial_files)
+    state.partial_files = new_partial_files
+    stale.extend(sorted(dependents(state.graph, "partials", set(changed + removed)) - set(stale)))
+
+    if file_signature(state.template_path) != state.template_signature:
+        state.template_signature = file_signature(state.template_path)
+        state.settings.template = load_template(state.template_path)
+        state.settings.template.rebase(state.basepath)
+        manifest["template"] = hash_file(state.template_path)
+        stale = list(pages)
+
+    rendered = []
+    failed = set()
+    pending = stale
+    while pending:
+        url_sources = {page["url"]: from_path for from_path, page in directives.pages.items()}
+        for from_path in pending:
+            page = pages[from_path]
+            makedirs(path.dirname(page["dest"]), exist_ok=True)
+            try:
+                result = render_page(from_path, page["dest"], state.settings)
+            except Exception as e:
+                log(str(e), QUIET)
+                failed.add(from_path)
+                continue
+            page["title"] = result["title"]
+            page["meta"] = result["meta"]
+            page["hash"] = hash_file(from_path)
+            manifest["pages"][from_path] = {"hash": page["hash"], "dest": page["dest"]}
+            directives.pages[from_path]["title"] = page["title"]
+            state.graph[from_path] = page_edges(result, url_sources, manifest["static"])
+            rendered.append(from_path)
+        partial_hashes = PartialHashes()
+        pending = [from_path for from_path, edges in state.graph.items() if from_path not in failed and outdated(edges, partial_hashes, directives)]
+
+    new_static_files = snapshot(state.static_src)
+    changed, removed = diff_snapshots(state.static_files, new_static_files)
+    state.static_files = new_static_files
+    dirty = dirty or bool(stale or changed or removed)
+    for file_path in changed:
+        inner_path = static_inner_path(file_path, state.static_src)
+        dest_path = f"{state.dest_dir_path}{inner_path}"
+        makedirs(path.dirname(dest_path), exist_ok=True)
+        sync_static_file(file_path, dest_path)
+        manifest["static"][inner_path] = list(new_static_files[file_path])
+        if state.gzip_level is not None and path.splitext(inner_path)[1].lower() in COMPRESSIBLE:
+            gzip_file(file_path, f"{dest_path}.gz", state.gzip_level)
+            manifest["compressed"][inner_path] = manifest["static"][inner_path] + [hash_file(file_path)]
+        log(f"Synced {file_path} to {dest_path}", VERBOSE)
+    for file_path in removed:
+        inner_path = static_inner_path(file_path, state.static_src)
+        dest_path = f"{state.dest_dir_path}{inner_path}"
+        manifest["static"].pop(inner_path, None)
+        manifest["compressed"].pop(inner_path, None)
+        if path.exists(dest_path):
+            remove_output(dest_path)
+            log(f"Removed {dest_path}", VERBOSE)
+
+    if dirty:
+        url_sources = {page["url"]: from_path for from_path, page in directives.pages.items()}
+        report_broken_links(broken_links(state.graph, url_sources, manifest["static"]))
+        log(f"Rebuilt in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return rendered
+
+def watch(static_src, dir_path_content, template_path, dest_dir_path, basepath, manifest_path, port=8888, interval=0.2, minify=False, gzip_level=None, partials_path=None):
+    build_site(static_src, dir_path_content, template_path, dest_dir_path, basepath, manifest_path, minify=minify, gzip_level=gzip_level, partials_path=partials_path)
+    state = WatchState(static_src, dir_path_content, template_path, dest_dir_path, basepath, manifest_path, minify, gzip_level, partials_path)
+    server = serve(dest_dir_path, port)
+    log(f"Serving {dest_dir_path} at http://localhost:{port}{basepath} (watching for changes, Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(interval)
+            poll_once(state)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        state.save()